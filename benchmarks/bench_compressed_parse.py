@@ -0,0 +1,81 @@
+"""Throughput of the D0010 parser on plain vs compressed input.
+
+Compares parsing an uncompressed file against the streaming gzip and zip
+paths, and against the old workflow of decompressing to disk first.
+
+    python benchmarks/bench_compressed_parse.py [meter_points]
+"""
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meter_readings.parser import iter_d0010_path, parse_d0010_file  # noqa: E402
+
+
+def build_flow_file(meter_points: int) -> str:
+    """Synthetic D0010 with one meter and two registers per meter point."""
+    rows = ["ZHV|0000475656|D0010002|D|UDMS|X|MRCY|20160302153151||||OPER|"]
+    for i in range(meter_points):
+        rows.append(f"026|{1200000000000 + i}|V|")
+        rows.append(f"028|SER{i:08d}|C|")
+        rows.append(f"030|01|20160222000000|{i % 99999}.0|||T|N|")
+        rows.append(f"030|02|20160222000000|{i % 88888}.0|||T|N|")
+    rows.append(f"ZPT|0000475656|{len(rows) - 1}||1|20160302153151|")
+    return "\n".join(rows) + "\n"
+
+
+def timed(label, fn, size_bytes, repeat=3):
+    best = min(_run(fn) for _ in range(repeat))
+    mb = size_bytes / (1024 * 1024)
+    print(f"{label:<28} {best * 1000:8.1f} ms  {mb / best:7.1f} MB/s (uncompressed)")
+
+
+def _run(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    meter_points = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    content = build_flow_file(meter_points).encode()
+    tmpdir = tempfile.mkdtemp()
+
+    try:
+        plain = os.path.join(tmpdir, "bench.uff")
+        with open(plain, "wb") as f:
+            f.write(content)
+
+        gz = plain + ".gz"
+        with gzip.open(gz, "wb") as f:
+            f.write(content)
+
+        zipped = os.path.join(tmpdir, "bench.zip")
+        with zipfile.ZipFile(zipped, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(plain, "bench.uff")
+
+        def decompress_then_parse():
+            # what we did before: gunzip to disk, then parse the copy
+            out = os.path.join(tmpdir, "unpacked.uff")
+            with gzip.open(gz, "rb") as src, open(out, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            parse_d0010_file(out)
+            os.remove(out)
+
+        print(f"{meter_points} meter points, {len(content) / 1024 / 1024:.1f} MB uncompressed")
+        timed("plain", lambda: parse_d0010_file(plain), len(content))
+        timed("gzip (streamed)", lambda: parse_d0010_file(gz), len(content))
+        timed("zip (streamed)", lambda: list(iter_d0010_path(zipped)), len(content))
+        timed("gzip (decompress to disk)", decompress_then_parse, len(content))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""CPU cost of building /api/readings/ payloads: ReadingSerializer + DRF's
+JSONRenderer against the flat-row orjson path in fast_rows.
+
+Runs against a throwaway test database, so it's safe to point at any
+settings module.
+
+    python benchmarks/bench_reading_serialisation.py [rows]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kraken_flow.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from meter_readings.fast_rows import dumps, reading_rows  # noqa: E402
+from meter_readings.importer import import_flow_file  # noqa: E402
+from meter_readings.models import Reading  # noqa: E402
+from meter_readings.parser import (  # noqa: E402
+    FlowFileData, MeterData, MeterPointData, ReadingData,
+)
+from meter_readings.serializers import ReadingSerializer  # noqa: E402
+
+
+def build_flow_file(rows: int) -> FlowFileData:
+    flow_file = FlowFileData(filename='bench.uff', file_header_id='1')
+    start = datetime(2016, 1, 1)
+    for i in range(rows // 2):
+        meter = MeterData(serial_number=f'SER{i:08d}', meter_type='C')
+        for register in ('01', '02'):
+            meter.readings.append(ReadingData(
+                register_id=register,
+                reading_date=start + timedelta(days=i % 365),
+                value=f'{i % 99999}.0',
+                reading_type='T',
+                is_estimated=False,
+            ))
+        flow_file.meter_points.append(
+            MeterPointData(mpan=str(1200000000000 + i), validation_status='V', meters=[meter])
+        )
+    return flow_file
+
+
+def serializer_path():
+    queryset = Reading.objects.select_related('meter__meter_point__flow_file')
+    return JSONRenderer().render(ReadingSerializer(queryset, many=True).data)
+
+
+def fast_path():
+    return dumps(list(reading_rows(Reading.objects.all())))
+
+
+def measure(label, fn, rows, repeat=5):
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        cpu.append(time.process_time() - start)
+    per_10k = min(cpu) * 10000 / rows
+    print(f'{label:<24} {min(cpu) * 1000:8.1f} ms CPU  ({per_10k * 1000:.1f} ms per 10k rows)')
+    return per_10k
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        import_flow_file(build_flow_file(rows))
+        print(f'{Reading.objects.count()} readings')
+        before = measure('ReadingSerializer', serializer_path, rows)
+        after = measure('values() + orjson', fast_path, rows)
+        print(f'speed-up: {before / after:.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Startup cost of the import_d0010 CLI under the full and ingestion profiles.
+
+Runs each entry point with `python -X importtime ... --help` (so Django is
+set up and the command loaded, but nothing is imported) and reports the
+total import time, wall-clock time and the most expensive top-level imports.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "manage.py import_d0010": [sys.executable, "-X", "importtime", "manage.py", "import_d0010", "--help"],
+    "ingest.py": [sys.executable, "-X", "importtime", "ingest.py", "--help"],
+}
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run(command):
+    env = {k: v for k, v in os.environ.items() if k != "DJANGO_SETTINGS_MODULE"}
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    total_us = 0
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total_us += int(self_us)
+        if len(indent) == 1:  # only modules imported directly by the entry point
+            top_level.append((int(cumulative_us), module))
+    return wall, total_us, sorted(top_level, reverse=True)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for label, command in ENTRY_POINTS.items():
+        results = [run(command) for _ in range(runs)]
+        wall = min(r[0] for r in results)
+        imports = min(r[1] for r in results)
+        print(f"{label}: best of {runs} - {wall * 1000:.0f} ms wall, {imports / 1000:.0f} ms importing")
+        for cumulative_us, module in results[-1][2][:8]:
+            print(f"    {cumulative_us / 1000:7.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+"""Lean entry point for importing D0010 files from scripts.
+
+Runs import_d0010 under the minimal ingestion settings profile, so only the
+ORM and the parser are loaded. Pass file paths as arguments, or --stdin to
+import a whole list of files in one process:
+
+    find drop/ -name '*.uff' | ./ingest.py --stdin
+"""
+import os
+import sys
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kraken_flow.settings_ingest')
+    from django.core.management import execute_from_command_line
+    execute_from_command_line([sys.argv[0], 'import_d0010', *sys.argv[1:]])
+
+
+if __name__ == '__main__':
+    main()
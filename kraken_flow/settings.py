@@ -2,6 +2,7 @@
 Django settings for kraken_flow project.
 Generated by 'django-admin startproject' using Django 4.2.28.
 """
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,13 +26,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # sampled SQL profiling for /api/ requests, see QUERY_PROFILING
+    'meter_readings.profiling.QueryProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # session/auth/messages are skipped for token-authenticated /api/ calls
+    'meter_readings.middleware.APISessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'meter_readings.middleware.APIAuthenticationMiddleware',
+    'meter_readings.middleware.APIMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -62,6 +66,23 @@ DATABASES = {
     }
 }
 
+# Reading shards - meter data can be spread over several databases by MPAN
+# (see meter_readings/sharding.py). Local SQLite files stand in for the
+# shard servers. Sharding is off unless KRAKEN_SHARDING=1; when switching it
+# on, run `migrate --database <alias>` for each shard.
+READING_SHARD_DATABASES = [
+    f'shard_{i}' for i in range(int(os.environ.get('KRAKEN_SHARD_COUNT', '2')))
+]
+for _alias in READING_SHARD_DATABASES:
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_{_alias}.sqlite3',
+    }
+
+READING_SHARDS = READING_SHARD_DATABASES if os.environ.get('KRAKEN_SHARDING') == '1' else []
+
+DATABASE_ROUTERS = ['meter_readings.sharding.ShardRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -78,13 +99,74 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Reading validation - a register advancing more than this between two
+# reads is flagged as an implausible jump
+READING_MAX_JUMP = 100000
+
 # CORS settings
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
 ]
 
+# Sessions live in a signed cookie, so a logged-in request doesn't need a
+# database lookup to load its session
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
 # Session/CSRF settings for cross-origin auth
 SESSION_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SAMESITE = 'Lax'
-CSRF_TRUSTED_ORIGINS = ['http://localhost:3000']
\ No newline at end of file
+CSRF_TRUSTED_ORIGINS = ['http://localhost:3000']
+
+# API auth - signed bearer tokens first (no database hit), then the browser session
+REST_FRAMEWORK = {
+    # JSON rendering is timed for the query profiler
+    'DEFAULT_RENDERER_CLASSES': [
+        'meter_readings.profiling.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'meter_readings.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Lifetime of tokens from /api/token/, in seconds
+API_TOKEN_MAX_AGE = 900
+
+# Query profiling (see meter_readings/profiling.py). Off unless
+# KRAKEN_PROFILE_SAMPLE_RATE is set, e.g. 0.01 to profile 1% of /api/
+# requests. Sampled responses get a Server-Timing header; ones slower than
+# SLOW_REQUEST_MS go to the slow request log below.
+QUERY_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('KRAKEN_PROFILE_SAMPLE_RATE', '0')),
+    'SLOW_REQUEST_MS': 500,
+    'SLOWEST_QUERIES': 5,
+    'EXPLAIN': True,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message_only': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message_only',
+        },
+    },
+    'loggers': {
+        'meter_readings.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,20 @@
+"""
+Minimal settings profile for bulk D0010 ingestion.
+
+Same database as the main settings, but only the meter_readings app is
+loaded - no admin, DRF, CORS, sessions or templates - so scripted imports
+don't pay for the web stack at startup. Used by ingest.py.
+"""
+from kraken_flow.settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'meter_readings',
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+AUTH_PASSWORD_VALIDATORS = []
+
+ROOT_URLCONF = 'kraken_flow.urls_ingest'
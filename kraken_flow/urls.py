@@ -5,12 +5,16 @@ from django.contrib.auth import views as auth_views
 from meter_readings.api_views import (
     ReadingListView,
     ReadingsByDateView,
+    ChangeFeedView,
     MeterPointListView,
     MeterPointDetailView,
+    LatestReadingListView,
     FlowFileListView,
+    AnomalyListView,
     StatsView,
     FileUploadView,
     LoginView,
+    TokenView,
     LogoutView,
     CurrentUserView,
 )
@@ -19,12 +23,16 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/readings/', ReadingListView.as_view()),
     path('api/readings/by-date/', ReadingsByDateView.as_view()),
+    path('api/changes/', ChangeFeedView.as_view()),
     path('api/meter-points/', MeterPointListView.as_view()),
     path('api/meter-points/<str:mpan>/', MeterPointDetailView.as_view()),
+    path('api/meter-points/<str:mpan>/latest/', LatestReadingListView.as_view()),
     path('api/files/', FlowFileListView.as_view()),
+    path('api/anomalies/', AnomalyListView.as_view()),
     path('api/stats/', StatsView.as_view()),
     path('api/upload/', FileUploadView.as_view()),
     path('api/login/', LoginView.as_view()),
+    path('api/token/', TokenView.as_view()),
     path('api/logout/', LogoutView.as_view()),
     path('api/user/', CurrentUserView.as_view()),
 ]
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""No routes - the ingestion profile never serves HTTP, this just keeps the
+URL system checks from importing the admin and API views."""
+urlpatterns = []
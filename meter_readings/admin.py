@@ -1,27 +1,95 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db import transaction
+from django.db.models import Q
 
-from meter_readings.models import FlowFile, MeterPoint, Meter, Reading
+from meter_readings.admin_tools import (
+    EstimatedCountPaginator,
+    IndexedYearFilter,
+)
+from meter_readings.latest import refresh_latest_readings
+from meter_readings.models import (
+    FlowFile,
+    MeterPoint,
+    Meter,
+    Reading,
+    LatestRegisterReading,
+    ProcessedFile,
+    ReadingAnomaly,
+)
+from meter_readings.sharding import sharding_enabled
+
+
+class MeterDataAdmin(admin.ModelAdmin):
+    """Admin for the meter data tables. The admin only reads the default
+    database, which has none of these tables once sharding is on, so they
+    drop out of the admin then (hidden from the index, 403 if linked to)
+    rather than erroring. Use the API, which reads every shard, instead.
+
+    Deleting readings (directly or through a file, meter point or meter)
+    recomputes the latest-reading rows of the meter points affected, so
+    an older read takes over from a deleted latest one."""
+    # path from the model to the MPANs whose readings a delete removes
+    mpan_path = None
+
+    def affected_mpans(self, queryset) -> set:
+        if self.mpan_path is None:
+            return set()
+        return set(queryset.values_list(self.mpan_path, flat=True)) - {None}
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            mpans = self.affected_mpans(self.model.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+            refresh_latest_readings(mpans)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            mpans = self.affected_mpans(queryset)
+            super().delete_queryset(request, queryset)
+            refresh_latest_readings(mpans)
+
+    def has_view_permission(self, request, obj=None):
+        return not sharding_enabled() and super().has_view_permission(request, obj)
+
+    def has_add_permission(self, request):
+        return not sharding_enabled() and super().has_add_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return not sharding_enabled() and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not sharding_enabled() and super().has_delete_permission(request, obj)
 
 
 @admin.register(FlowFile)
-class FlowFileAdmin(admin.ModelAdmin):
+class FlowFileAdmin(MeterDataAdmin):
     list_display = ("filename", "file_header_id", "imported_at")
+    mpan_path = "meter_points__mpan"
 
 
 @admin.register(MeterPoint)
-class MeterPointAdmin(admin.ModelAdmin):
+class MeterPointAdmin(MeterDataAdmin):
     list_display = ("mpan", "validation_status", "flow_file")
     search_fields = ("mpan",)
+    mpan_path = "mpan"
 
 
 @admin.register(Meter)
-class MeterAdmin(admin.ModelAdmin):
+class MeterAdmin(MeterDataAdmin):
     list_display = ("serial_number", "meter_type", "meter_point")
     search_fields = ("serial_number",)
+    mpan_path = "meter_point__mpan"
+
+
+class ReadingYearFilter(IndexedYearFilter):
+    title = "reading date"
+    parameter_name = "reading_year"
+    field_name = "reading_date"
 
 
 @admin.register(Reading)
-class ReadingAdmin(admin.ModelAdmin):
+class ReadingAdmin(MeterDataAdmin):
     """Main admin view for support staff. Lets them search by MPAN or
     meter serial number and see which file the reading came from."""
     list_display = (
@@ -35,13 +103,51 @@ class ReadingAdmin(admin.ModelAdmin):
         "get_filename",
     )
     # double underscores follow the FK chain: Reading -> Meter -> MeterPoint -> mpan
+    # exact match only (see get_search_results) so searches stay on the indexes
     search_fields = (
-        "meter__meter_point__mpan",
-        "meter__serial_number",
+        "=meter__meter_point__mpan",
+        "=meter__serial_number",
     )
+    search_help_text = "Exact MPAN or meter serial number"
     # joins everything in one query instead of hitting the db per row
     list_select_related = ("meter__meter_point__flow_file",)
-    list_filter = ("reading_date", "is_estimated")
+    list_filter = (ReadingYearFilter, "is_estimated")
+
+    # the table is too big for COUNT(*) and OFFSET on every page -
+    # counts are estimated and "older" links page by primary key instead
+    # (?id__lt=<last id on the page>, a plain admin lookup on the pk index)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+    keyset_param = "id__lt"
+    mpan_path = "meter__meter_point__mpan"
+
+    def get_search_results(self, request, queryset, search_term):
+        # the whole term is one value - serial numbers often contain spaces,
+        # which the default search would split into separate terms
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            Q(meter__meter_point__mpan=search_term) | Q(meter__serial_number=search_term)
+        ), False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, "context_data", {}).get("cl")
+        # the id cursor only follows the default newest-first order - sorted
+        # by another column, rows past the last pk would be skipped
+        if changelist is not None and ORDER_VAR not in request.GET:
+            results = list(changelist.result_list)
+            if len(results) >= changelist.list_per_page:
+                response.context_data["older_url"] = changelist.get_query_string(
+                    {self.keyset_param: results[-1].pk}, remove=["p"],
+                )
+            if self.keyset_param in request.GET:
+                response.context_data["newest_url"] = changelist.get_query_string(
+                    remove=[self.keyset_param, "p"],
+                )
+        return response
 
     @admin.display(description="MPAN")
     def get_mpan(self, obj):
@@ -53,4 +159,37 @@ class ReadingAdmin(admin.ModelAdmin):
 
     @admin.display(description="Source File")
     def get_filename(self, obj):
-        return obj.meter.meter_point.flow_file.filename
\ No newline at end of file
+        return obj.meter.meter_point.flow_file.filename
+
+
+@admin.register(LatestRegisterReading)
+class LatestRegisterReadingAdmin(MeterDataAdmin):
+    """Current state per register - the quick answer to "what's the latest
+    read on this meter". Search is exact match so it stays on the index."""
+    list_display = (
+        "mpan",
+        "serial_number",
+        "register_id",
+        "reading_date",
+        "value",
+        "reading_type",
+        "is_estimated",
+        "updated_at",
+    )
+    search_fields = ("=mpan", "=serial_number")
+    raw_id_fields = ("reading",)
+
+
+@admin.register(ProcessedFile)
+class ProcessedFileAdmin(admin.ModelAdmin):
+    list_display = ("filename", "status", "reading_count", "size", "processed_at")
+    list_filter = ("status",)
+    search_fields = ("filename",)
+
+
+@admin.register(ReadingAnomaly)
+class ReadingAnomalyAdmin(MeterDataAdmin):
+    list_display = ("mpan", "serial_number", "kind", "previous_value", "reading", "detected_at")
+    list_filter = ("kind",)
+    search_fields = ("=mpan", "=serial_number")
+    raw_id_fields = ("reading", "previous_reading")
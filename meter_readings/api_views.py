@@ -1,44 +1,183 @@
+import uuid
+
 from django.contrib.auth import authenticate, login, logout
 from django.db.models import Count, Avg
 from django.db.models.functions import TruncDate
 from rest_framework import generics, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 
-from meter_readings.models import FlowFile, MeterPoint, Meter, Reading
+from meter_readings.models import (
+    FlowFile,
+    MeterPoint,
+    Meter,
+    Reading,
+    LatestRegisterReading,
+    ReadingAnomaly,
+)
 from meter_readings.serializers import (
     ReadingSerializer,
     MeterPointListSerializer,
     MeterPointDetailSerializer,
     FlowFileSerializer,
+    LatestRegisterReadingSerializer,
+    ReadingAnomalySerializer,
     StatsSerializer,
 )
-from meter_readings.parser import parse_d0010_file
+from meter_readings.authentication import issue_token, token_max_age
+from meter_readings.changes import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, changes_page
+from meter_readings.fast_rows import FastJSONResponse, reading_rows
+from meter_readings.importer import atomic_import, import_flow_file
+from meter_readings.parser import iter_d0010_fileobj
+from meter_readings.profiling import section
+from meter_readings.sharding import scatter, shard_aliases, shard_for_mpan
+
+
+class MergedResults(list):
+    """Rows gathered from the shards, carrying the total across all shards
+    so the paginator counts every match, not just the rows fetched."""
+    total = 0
+
+    def count(self):
+        return self.total
+
+
+class ShardedListMixin:
+    """For list views over meter data. With one database the filtered
+    queryset goes straight to the paginator, so paging happens in SQL.
+    With several, the query runs on every shard and the results are
+    concatenated - each shard only returns enough rows to fill the
+    requested page. Set merge_ordering to re-sort the merged list,
+    e.g. ('-detected_at', '-id')."""
+    merge_ordering = ()
+    # turn off when one result can be made of several shards' rows
+    limit_per_shard = True
+
+    def shard_limit(self):
+        """Rows each shard needs to return for the requested page, or None
+        for all of them (no pagination, or a page we can't work out)."""
+        paginator = self.paginator
+        if paginator is None or not self.limit_per_shard:
+            return None
+        request = self.request
+        if hasattr(paginator, 'get_offset'):  # LimitOffsetPagination
+            limit = paginator.get_limit(request)
+            return paginator.get_offset(request) + limit if limit else None
+        page_size = paginator.get_page_size(request)
+        try:
+            page = int(request.query_params.get(paginator.page_query_param, 1))
+        except ValueError:
+            return None  # e.g. ?page=last
+        return page * page_size if page_size else None
+
+    def gather(self, queryset) -> list:
+        limit = self.shard_limit()
+        results = MergedResults()
+        for shard_queryset in scatter(queryset):
+            if limit is None:
+                results += shard_queryset
+            else:
+                results += shard_queryset[:limit]
+                results.total += shard_queryset.count()
+        if limit is None:
+            results.total = len(results)
+        # stable sorts applied last key first give the combined ordering.
+        # results are model instances or, on the fast path, dict rows
+        for field in reversed(self.merge_ordering):
+            name = field.lstrip('-')
+            results.sort(
+                key=lambda obj: obj[name] if isinstance(obj, dict) else getattr(obj, name),
+                reverse=field.startswith('-'),
+            )
+        return results
+
+    def shard_results(self, queryset):
+        """The queryset itself with one database, else the merged shard results."""
+        if len(shard_aliases()) == 1:
+            return queryset
+        return self.gather(queryset)
+
+    def list(self, request, *args, **kwargs):
+        results = self.shard_results(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(results)
+        with section('serialize'):
+            data = self.get_serializer(page if page is not None else results, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
 
-class ReadingListView(generics.ListAPIView):
-    """Search readings by MPAN or serial number."""
+class ReadingListView(ShardedListMixin, generics.ListAPIView):
+    """Search readings by MPAN or serial number, across all shards.
+    JSON responses skip the serializer and are built from flat rows
+    (see fast_rows) - the browsable API still goes through ReadingSerializer."""
     serializer_class = ReadingSerializer
-    queryset = Reading.objects.select_related('meter__meter_point__flow_file').all()
+    queryset = Reading.objects.select_related('meter__meter_point__flow_file').order_by('id')
+    merge_ordering = ('id',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['meter__meter_point__mpan', 'meter__serial_number']
 
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        rows = self.shard_results(reading_rows(self.filter_queryset(self.get_queryset())))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return FastJSONResponse(list(rows))
+
 
 class ReadingsByDateView(APIView):
     """Readings grouped by date for charts."""
     def get(self, request):
-        data = (
-            Reading.objects
-            .annotate(date=TruncDate('reading_date'))
-            .values('date')
-            .annotate(count=Count('id'), avg_value=Avg('value'))
-            .order_by('date')
-        )
-        return Response(list(data))
+        per_shard = [
+            list(
+                queryset
+                .annotate(date=TruncDate('reading_date'))
+                .values('date')
+                .annotate(count=Count('id'), avg_value=Avg('value'))
+                .order_by('date')
+            )
+            for queryset in scatter(Reading.objects.all())
+        ]
+        if len(per_shard) == 1:
+            return Response(per_shard[0])
+
+        # combine shards' daily averages weighted by their counts
+        merged = {}
+        for rows in per_shard:
+            for row in rows:
+                count, total = merged.get(row['date'], (0, 0))
+                merged[row['date']] = (count + row['count'], total + row['avg_value'] * row['count'])
+        return Response([
+            {'date': date, 'count': count, 'avg_value': total / count}
+            for date, (count, total) in sorted(merged.items())
+        ])
+
+
+class ChangeFeedView(APIView):
+    """Readings imported since a cursor, for downstream sync jobs.
+    Start with no ?since=, then pass back each page's next_cursor until
+    has_more is false. Store the last next_cursor for the next sync.
+    ?page_size= sets the page size, capped at MAX_PAGE_SIZE."""
+    def get(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'page_size must be a number'}, status=400)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+        try:
+            rows, next_cursor, has_more = changes_page(request.query_params.get('since'), page_size)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return FastJSONResponse({'results': rows, 'next_cursor': next_cursor, 'has_more': has_more})
 
 
-class MeterPointListView(generics.ListAPIView):
+class MeterPointListView(ShardedListMixin, generics.ListAPIView):
     """List all meter points with counts."""
     serializer_class = MeterPointListSerializer
     queryset = (
@@ -48,7 +187,9 @@ class MeterPointListView(generics.ListAPIView):
             meter_count=Count('meters', distinct=True),
             reading_count=Count('meters__readings', distinct=True),
         )
+        .order_by('id')
     )
+    merge_ordering = ('id',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['mpan']
 
@@ -61,11 +202,28 @@ class MeterPointDetailView(generics.RetrieveAPIView):
 
     def get_object(self):
         mpan = self.kwargs['mpan']
-        return self.get_queryset().filter(mpan=mpan).first()
+        return self.get_queryset().using(shard_for_mpan(mpan)).filter(mpan=mpan).first()
 
 
-class FlowFileListView(generics.ListAPIView):
-    """List imported files."""
+class LatestReadingListView(generics.ListAPIView):
+    """Current read on each register for a meter point, served from the
+    latest-reading table instead of the meter point's full history."""
+    serializer_class = LatestRegisterReadingSerializer
+
+    def get_queryset(self):
+        mpan = self.kwargs['mpan']
+        return (
+            LatestRegisterReading.objects
+            .using(shard_for_mpan(mpan))
+            .filter(mpan=mpan)
+            .order_by('serial_number', 'register_id')
+        )
+
+
+class FlowFileListView(ShardedListMixin, generics.ListAPIView):
+    """List imported files. With sharding on, an import has a FlowFile row
+    on each shard it touched - those are merged back into one entry by
+    import_id. Ids are per shard, so refer to files by import_id."""
     serializer_class = FlowFileSerializer
     queryset = (
         FlowFile.objects
@@ -75,20 +233,76 @@ class FlowFileListView(generics.ListAPIView):
         )
         .order_by('-imported_at')
     )
+    merge_ordering = ('-imported_at',)
+    # merged entries span shards, so every shard's rows are needed - the
+    # file table is small, one row per import per shard
+    limit_per_shard = False
+
+    def gather(self, queryset) -> list:
+        results = super().gather(queryset)
+        merged = {}
+        for flow_file in results:
+            first = merged.setdefault(flow_file.import_id, flow_file)
+            if first is not flow_file:
+                first.meter_point_count += flow_file.meter_point_count
+                first.reading_count += flow_file.reading_count
+        return list(merged.values())
+
+
+class AnomalyListView(ShardedListMixin, generics.ListAPIView):
+    """Readings flagged by the import validation stage.
+    Filter with ?kind=, ?mpan=, ?serial_number= or ?flow_file=<import_id>."""
+    serializer_class = ReadingAnomalySerializer
+    merge_ordering = ('-detected_at', '-id')
+
+    def get_queryset(self):
+        queryset = (
+            ReadingAnomaly.objects
+            .select_related('reading__meter__meter_point__flow_file')
+            .order_by('-detected_at', '-id')
+        )
+        params = self.request.query_params
+        if params.get('kind'):
+            queryset = queryset.filter(kind=params['kind'])
+        if params.get('mpan'):
+            queryset = queryset.filter(mpan=params['mpan'])
+        if params.get('serial_number'):
+            queryset = queryset.filter(serial_number=params['serial_number'])
+        if params.get('flow_file'):
+            # import_id rather than the pk, which differs from shard to shard
+            try:
+                import_id = uuid.UUID(params['flow_file'])
+            except ValueError:
+                raise ValidationError({'flow_file': "Must be a file's import_id."})
+            queryset = queryset.filter(reading__meter__meter_point__flow_file__import_id=import_id)
+        return queryset
 
 
 class StatsView(APIView):
-    """Dashboard summary stats."""
+    """Dashboard summary stats, summed over all shards."""
     def get(self, request):
+        def count(queryset):
+            return sum(shard_queryset.count() for shard_queryset in scatter(queryset))
+
+        if len(shard_aliases()) == 1:
+            total_files = FlowFile.objects.count()
+        else:
+            # an import split across shards has a row on each - count it once
+            total_files = len({
+                import_id
+                for queryset in scatter(FlowFile.objects.all())
+                for import_id in queryset.values_list('import_id', flat=True)
+            })
+
         data = {
-            'total_readings': Reading.objects.count(),
-            'total_meter_points': MeterPoint.objects.count(),
-            'total_meters': Meter.objects.count(),
-            'total_files': FlowFile.objects.count(),
-            'estimated_readings': Reading.objects.filter(is_estimated=True).count(),
-            'actual_readings': Reading.objects.filter(is_estimated=False).count(),
-            'current_meters': Meter.objects.filter(meter_type='C').count(),
-            'disconnected_meters': Meter.objects.filter(meter_type='D').count(),
+            'total_readings': count(Reading.objects.all()),
+            'total_meter_points': count(MeterPoint.objects.all()),
+            'total_meters': count(Meter.objects.all()),
+            'total_files': total_files,
+            'estimated_readings': count(Reading.objects.filter(is_estimated=True)),
+            'actual_readings': count(Reading.objects.filter(is_estimated=False)),
+            'current_meters': count(Meter.objects.filter(meter_type='C')),
+            'disconnected_meters': count(Meter.objects.filter(meter_type='D')),
         }
         serializer = StatsSerializer(data)
         return Response(serializer.data)
@@ -103,59 +317,25 @@ class FileUploadView(APIView):
         if not file:
             return Response({'error': 'No file provided'}, status=400)
 
-        import tempfile
-        import os
-        from django.db import transaction
-
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.uff') as tmp:
-                for chunk in file.chunks():
-                    tmp.write(chunk)
-                tmp_path = tmp.name
-
-            parsed = parse_d0010_file(tmp_path)
-            parsed.filename = file.name
-
+            # parse straight from the upload - compressed files and zip
+            # archives are decompressed as they're read, no temp file needed.
+            # a bad zip member rolls back the members before it too
+            meter_point_count = 0
             reading_count = 0
-            with transaction.atomic():
-                flow_file = FlowFile.objects.create(
-                    filename=parsed.filename,
-                    file_header_id=parsed.file_header_id,
-                )
-                for mp_data in parsed.meter_points:
-                    meter_point = MeterPoint.objects.create(
-                        flow_file=flow_file,
-                        mpan=mp_data.mpan,
-                        validation_status=mp_data.validation_status,
-                    )
-                    for meter_data in mp_data.meters:
-                        meter = Meter.objects.create(
-                            meter_point=meter_point,
-                            serial_number=meter_data.serial_number,
-                            meter_type=meter_data.meter_type,
-                        )
-                        for reading_data in meter_data.readings:
-                            Reading.objects.create(
-                                meter=meter,
-                                register_id=reading_data.register_id,
-                                reading_date=reading_data.reading_date,
-                                value=reading_data.value,
-                                reading_type=reading_data.reading_type,
-                                is_estimated=reading_data.is_estimated,
-                            )
-                            reading_count += 1
+            with atomic_import():
+                for parsed in iter_d0010_fileobj(file, file.name):
+                    reading_count += import_flow_file(parsed)
+                    meter_point_count += len(parsed.meter_points)
 
             return Response({
-                'message': f'Imported {len(parsed.meter_points)} meter points with {reading_count} readings',
-                'filename': parsed.filename,
+                'message': f'Imported {meter_point_count} meter points with {reading_count} readings',
+                'filename': file.name,
             })
 
         except Exception as e:
             return Response({'error': str(e)}, status=400)
 
-        finally:
-            os.unlink(tmp_path)
-
 
 class LoginView(APIView):
     """Log in with username and password."""
@@ -169,6 +349,18 @@ class LoginView(APIView):
         return Response({'error': 'Invalid credentials'}, status=401)
 
 
+class TokenView(APIView):
+    """Swap a username and password for a short-lived signed API token.
+    Send it back as `Authorization: Bearer <token>`."""
+    def post(self, request):
+        username = request.data.get('username')
+        password = request.data.get('password')
+        user = authenticate(request, username=username, password=password)
+        if user is None:
+            return Response({'error': 'Invalid credentials'}, status=401)
+        return Response({'token': issue_token(user), 'expires_in': token_max_age()})
+
+
 class LogoutView(APIView):
     """Log out the current user."""
     def post(self, request):
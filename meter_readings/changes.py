@@ -0,0 +1,77 @@
+"""Change feed of imported readings for downstream sync jobs.
+
+Every import takes the next import_seq on the database it writes to and
+stamps it on its FlowFile and Readings (see importer.next_import_seq).
+A consumer keeps a cursor - per database, the (import_seq, id) of the last
+reading it has seen - and asks for everything after it. Pages walk each
+database in (import_seq, id) order, so a sync only reads what was imported
+since the last one, however big the table has grown.
+
+Cursors are opaque to clients: URL-safe base64 of a JSON map of database
+alias to [import_seq, id].
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+from meter_readings.fast_rows import reading_rows
+from meter_readings.models import Reading
+from meter_readings.sharding import shard_aliases
+
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def encode_cursor(positions: dict) -> str:
+    data = json.dumps(positions, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> dict:
+    """{alias: (import_seq, id)} for every database holding readings.
+    Raises ValueError for a cursor this server didn't hand out."""
+    positions = {alias: (0, 0) for alias in shard_aliases()}
+    if not cursor:
+        return positions
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        # aliases no longer in use are dropped, new ones start from the beginning
+        positions.update({
+            alias: (int(seq), int(pk))
+            for alias, (seq, pk) in data.items()
+            if alias in positions
+        })
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError('Invalid cursor')
+    return positions
+
+
+def changes_page(cursor: str | None, page_size: int = DEFAULT_PAGE_SIZE):
+    """Up to page_size readings after the cursor.
+    Returns (rows, next_cursor, has_more). Databases are drained one after
+    another, so every row returned moves exactly one position forward."""
+    positions = decode_cursor(cursor)
+    rows = []
+    has_more = False
+    for alias, (seq, pk) in positions.items():
+        remaining = page_size - len(rows)
+        if remaining <= 0:
+            has_more = True
+            break
+        queryset = (
+            Reading.objects.using(alias)
+            .filter(Q(import_seq__gt=seq) | Q(import_seq=seq, id__gt=pk))
+            .order_by('import_seq', 'id')
+        )
+        # one extra row tells us whether this database has more to give
+        shard_rows = list(reading_rows(queryset, 'import_seq')[:remaining + 1])
+        if len(shard_rows) > remaining:
+            has_more = True
+            shard_rows = shard_rows[:remaining]
+        if shard_rows:
+            last = shard_rows[-1]
+            positions[alias] = (last['import_seq'], last['id'])
+            rows += shard_rows
+    return rows, encode_cursor(positions), has_more
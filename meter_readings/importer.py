@@ -0,0 +1,129 @@
+import uuid
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections, transaction
+from django.db.models import F
+
+from meter_readings.latest import update_latest_readings
+from meter_readings.models import FlowFile, MeterPoint, Meter, Reading, ImportSequence
+from meter_readings.parser import FlowFileData
+from meter_readings.sharding import group_by_shard, shard_aliases
+from meter_readings.validation import flag_anomalies
+
+
+# rows per INSERT statement
+BULK_BATCH_SIZE = 1000
+
+
+def _bulk_create(model, objs, using):
+    """bulk_create that leaves primary keys set on the objects, which the
+    next level down needs for its foreign keys."""
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(using).bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+    # backends that can't hand back ids get one INSERT per row
+    for obj in objs:
+        obj.save(using=using, force_insert=True)
+    return objs
+
+
+def next_import_seq(using: str) -> int:
+    """Take the next import sequence number on a database. Call inside the
+    import transaction - the UPDATE keeps the counter row locked until
+    commit, so concurrent imports queue up and commit in sequence order."""
+    sequence = ImportSequence.objects.using(using)
+    if not sequence.filter(pk=1).update(value=F('value') + 1):
+        # the migration creates the row - this covers a flushed database
+        sequence.create(pk=1, value=1)
+    return sequence.values_list('value', flat=True).get(pk=1)
+
+
+@contextmanager
+def atomic_import():
+    """Open a transaction on every database holding meter data, so several
+    files (e.g. the members of one zip) go in together or not at all.
+    With sharding on the shards still commit one after another - this
+    rolls everything back on an error, it isn't a two-phase commit."""
+    with ExitStack() as stack:
+        for alias in shard_aliases():
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+def import_flow_file(parsed: FlowFileData) -> int:
+    """Save a parsed D0010 file to the database.
+    Shared by the management commands and the upload view. Meter points
+    are fanned out to their shard (just the default database when sharding
+    is off), all inside atomic_import(), so a failure on one shard rolls
+    back what was written to the others.
+    Returns the number of readings created."""
+    import_id = uuid.uuid4()  # ties together this import's FlowFile rows
+    reading_count = 0
+    with atomic_import():
+        for alias, mp_datas in group_by_shard(parsed.meter_points, lambda mp: mp.mpan).items():
+            reading_count += _import_meter_points(parsed, mp_datas, alias, import_id)
+    return reading_count
+
+
+def _import_meter_points(parsed: FlowFileData, mp_datas, using: str, import_id) -> int:
+    """Write one database's share of a file. Each level of the hierarchy
+    goes in with bulk inserts rather than a query per row, then the
+    latest-reading table and anomaly checks are brought up to date.
+    Runs inside the transaction import_flow_file opens."""
+    import_seq = next_import_seq(using)
+    flow_file = FlowFile.objects.using(using).create(
+        filename=parsed.filename,
+        file_header_id=parsed.file_header_id,
+        import_seq=import_seq,
+        import_id=import_id,
+    )
+
+    meter_points = _bulk_create(MeterPoint, [
+        MeterPoint(
+            flow_file=flow_file,
+            mpan=mp_data.mpan,
+            validation_status=mp_data.validation_status,
+        )
+        for mp_data in mp_datas
+    ], using)
+
+    meter_pairs = [
+        (meter_point, meter_data)
+        for meter_point, mp_data in zip(meter_points, mp_datas)
+        for meter_data in mp_data.meters
+    ]
+    meters = _bulk_create(Meter, [
+        Meter(
+            meter_point=meter_point,
+            serial_number=meter_data.serial_number,
+            meter_type=meter_data.meter_type,
+        )
+        for meter_point, meter_data in meter_pairs
+    ], using)
+
+    readings = []
+    saved = []  # (mpan, serial, reading) for the latest-reading table
+    for meter, (meter_point, meter_data) in zip(meters, meter_pairs):
+        for reading_data in meter_data.readings:
+            reading = Reading(
+                meter=meter,
+                register_id=reading_data.register_id,
+                reading_date=reading_data.reading_date,
+                value=reading_data.value,
+                reading_type=reading_data.reading_type,
+                is_estimated=reading_data.is_estimated,
+                import_seq=import_seq,
+            )
+            readings.append(reading)
+            saved.append((meter_point.mpan, meter.serial_number, reading))
+    _bulk_create(Reading, readings, using)
+
+    update_latest_readings(saved, using=using)
+    # set-based checks over the file's meters, from its earliest read on
+    if readings:
+        flag_anomalies(
+            (mp.mpan for mp in meter_points),
+            using=using,
+            since=min(reading.reading_date for reading in readings),
+        )
+
+    return len(readings)
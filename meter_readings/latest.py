@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from meter_readings.models import LatestRegisterReading, Reading
+from meter_readings.sharding import MPAN_BATCH_SIZE
+
+
+LATEST_FIELDS = ['reading', 'reading_date', 'value', 'reading_type', 'is_estimated', 'updated_at']
+
+
+def _aware(value):
+    # parsed readings carry naive datetimes, rows loaded back from the db don't
+    if settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def _from_reading(mpan: str, serial_number: str, reading: Reading) -> LatestRegisterReading:
+    return LatestRegisterReading(
+        mpan=mpan,
+        serial_number=serial_number,
+        register_id=reading.register_id,
+        reading=reading,
+        reading_date=_aware(reading.reading_date),
+        value=reading.value,
+        reading_type=reading.reading_type,
+        is_estimated=reading.is_estimated,
+    )
+
+
+def update_latest_readings(readings: list[tuple[str, str, Reading]], using: str = DEFAULT_DB_ALIAS) -> int:
+    """Fold newly saved readings into LatestRegisterReading.
+    Takes (mpan, serial_number, reading) tuples and only replaces a stored
+    row when the incoming read is strictly newer, so importing an old file
+    after a new one leaves the current state alone.
+    Returns the number of rows created or updated."""
+    newest = {}
+    for mpan, serial_number, reading in readings:
+        key = (mpan, serial_number, reading.register_id)
+        current = newest.get(key)
+        if current is None or _aware(reading.reading_date) > _aware(current[2].reading_date):
+            newest[key] = (mpan, serial_number, reading)
+
+    mpans = sorted({key[0] for key in newest})
+    existing = {}
+    for i in range(0, len(mpans), MPAN_BATCH_SIZE):
+        batch = mpans[i:i + MPAN_BATCH_SIZE]
+        for row in LatestRegisterReading.objects.using(using).filter(mpan__in=batch):
+            existing[(row.mpan, row.serial_number, row.register_id)] = row
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for key, (mpan, serial_number, reading) in newest.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(_from_reading(mpan, serial_number, reading))
+        elif _aware(reading.reading_date) > row.reading_date:
+            row.reading = reading
+            row.reading_date = _aware(reading.reading_date)
+            row.value = reading.value
+            row.reading_type = reading.reading_type
+            row.is_estimated = reading.is_estimated
+            row.updated_at = now  # bulk_update doesn't apply auto_now
+            to_update.append(row)
+
+    LatestRegisterReading.objects.using(using).bulk_create(to_create)
+    LatestRegisterReading.objects.using(using).bulk_update(to_update, LATEST_FIELDS)
+    return len(to_create) + len(to_update)
+
+
+def _ranked_latest(using: str, mpans=None):
+    """The newest read per register, picked in the database with ROW_NUMBER()
+    rather than by walking every meter's history in Python."""
+    readings = Reading.objects.using(using)
+    if mpans is not None:
+        readings = readings.filter(meter__meter_point__mpan__in=mpans)
+    return (
+        readings
+        .annotate(
+            mpan=F('meter__meter_point__mpan'),
+            serial_number=F('meter__serial_number'),
+            rank=Window(
+                RowNumber(),
+                partition_by=[
+                    F('meter__meter_point__mpan'),
+                    F('meter__serial_number'),
+                    F('register_id'),
+                ],
+                order_by=[F('reading_date').desc(), F('id').desc()],
+            ),
+        )
+        .filter(rank=1)
+    )
+
+
+def refresh_latest_readings(mpans, using: str = DEFAULT_DB_ALIAS) -> int:
+    """Recompute LatestRegisterReading for some meter points, e.g. after
+    their readings were deleted. Registers with no reads left lose their row.
+    Returns the number of rows written."""
+    mpans = sorted(set(mpans))
+    count = 0
+    latest = LatestRegisterReading.objects.using(using)
+    with transaction.atomic(using=using):
+        for i in range(0, len(mpans), MPAN_BATCH_SIZE):
+            batch = mpans[i:i + MPAN_BATCH_SIZE]
+            latest.filter(mpan__in=batch).delete()
+            rows = [
+                _from_reading(reading.mpan, reading.serial_number, reading)
+                for reading in _ranked_latest(using, batch)
+            ]
+            latest.bulk_create(rows)
+            count += len(rows)
+    return count
+
+
+def rebuild_latest_readings(batch_size: int = 2000, using: str = DEFAULT_DB_ALIAS) -> int:
+    """Recompute LatestRegisterReading from scratch over the whole Reading table."""
+    count = 0
+    latest = LatestRegisterReading.objects.using(using)
+    with transaction.atomic(using=using):
+        latest.all().delete()
+        batch = []
+        for reading in _ranked_latest(using).iterator(chunk_size=batch_size):
+            batch.append(_from_reading(reading.mpan, reading.serial_number, reading))
+            if len(batch) >= batch_size:
+                latest.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        latest.bulk_create(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,72 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_readings.changes import DEFAULT_PAGE_SIZE, changes_page
+from meter_readings.fast_rows import dumps
+
+
+class Command(BaseCommand):
+    help = (
+        "Export readings imported since a cursor to NDJSON files, one file "
+        "per page, and save the cursor to carry on from next time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", type=str, help="Directory for the NDJSON files")
+        parser.add_argument(
+            "--cursor-file",
+            type=str,
+            help="File holding the cursor to start from. Updated after every page, "
+                 "so an interrupted export picks up where it stopped.",
+        )
+        parser.add_argument(
+            "--since",
+            type=str,
+            help="Cursor to start from (overrides --cursor-file; default: everything)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            help="Readings per NDJSON file",
+        )
+
+    def handle(self, *args, **options):
+        if options["page_size"] < 1:
+            raise CommandError("--page-size must be at least 1")
+        cursor_file = options["cursor_file"]
+        cursor = options["since"]
+        if cursor is None and cursor_file and os.path.exists(cursor_file):
+            with open(cursor_file) as f:
+                cursor = f.read().strip() or None
+
+        os.makedirs(options["output_dir"], exist_ok=True)
+        prefix = time.strftime("changes-%Y%m%d-%H%M%S")
+        page_number = 0
+        total = 0
+        while True:
+            try:
+                rows, cursor, has_more = changes_page(cursor, options["page_size"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            if rows:
+                page_number += 1
+                total += len(rows)
+                filepath = os.path.join(options["output_dir"], f"{prefix}-{page_number:05d}.ndjson")
+                with open(filepath, "wb") as f:
+                    for row in rows:
+                        f.write(dumps(row) + b"\n")
+            if cursor_file:
+                # written after the page is on disk, then swapped in whole
+                with open(cursor_file + ".tmp", "w") as f:
+                    f.write(cursor + "\n")
+                os.replace(cursor_file + ".tmp", cursor_file)
+            if not has_more:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported {total} readings in {page_number} file(s)")
+        )
+        self.stdout.write(f"Next cursor: {cursor}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from meter_readings.latest import rebuild_latest_readings
+from meter_readings.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Rebuild the latest-reading-per-register table from all imported readings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows written per bulk insert",
+        )
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            count = rebuild_latest_readings(batch_size=options["batch_size"], using=alias)
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {count} latest register readings on {alias}")
+            )
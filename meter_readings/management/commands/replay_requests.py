@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_readings.replay import (
+    HTTPTarget,
+    InProcessTarget,
+    compare,
+    load_log,
+    replay,
+    summarise,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a JSONL request log against the API and report per-endpoint "
+        "throughput, latency percentiles and DB queries. In-process replays "
+        "run against the configured database, so POSTs in the log really write."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("log_file", type=str, help="JSONL request log")
+        parser.add_argument(
+            "--base-url",
+            type=str,
+            help="Replay against a running server (e.g. http://localhost:8000) "
+                 "instead of in-process. Query counts are only available in-process.",
+        )
+        parser.add_argument("--concurrency", type=int, default=1, help="Parallel workers")
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0,
+            help="Maximum requests per second across all workers (0 = unlimited)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=1, help="Times to replay the whole log"
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Where to save the JSON report (default: replay_reports/replay-<timestamp>.json)",
+        )
+        parser.add_argument(
+            "--compare",
+            type=str,
+            help="Earlier report to compare against - exits non-zero on regressions",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p90 latency increase counted as a regression (default 0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        try:
+            requests = load_log(options["log_file"]) * options["repeat"]
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Can't read {options['log_file']}: {e}")
+        if not requests:
+            raise CommandError("No requests found in the log")
+
+        previous = None
+        if options["compare"]:
+            # checked up front so a long replay isn't wasted on a bad path
+            try:
+                with open(options["compare"]) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Can't read {options['compare']}: {e}")
+
+        if options["base_url"]:
+            target = HTTPTarget(options["base_url"])
+        else:
+            target = InProcessTarget()
+
+        results, duration = replay(
+            requests, target,
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+        )
+        report = summarise(results, duration)
+        report["target"] = options["base_url"] or "in-process"
+        report["concurrency"] = options["concurrency"]
+
+        self.print_report(report)
+
+        output = options["output"] or os.path.join(
+            "replay_reports", time.strftime("replay-%Y%m%d-%H%M%S.json")
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Report saved to {output}")
+
+        if previous is not None:
+            regressions = compare(report, previous, options["threshold"])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f"Regression: {line}"))
+            if regressions:
+                # non-zero exit so a CI step fails
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against previous run"))
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['requests']} requests in {report['duration_s']:.2f}s "
+            f"({report['throughput_rps']:.1f} req/s)"
+        )
+        for endpoint, stats in report["endpoints"].items():
+            queries = stats["avg_queries"]
+            self.stdout.write(
+                f"  {endpoint}: {stats['requests']} req, {stats['errors']} errors, "
+                f"p50 {stats['p50_ms']:.1f} ms, p90 {stats['p90_ms']:.1f} ms, "
+                f"p99 {stats['p99_ms']:.1f} ms"
+                + (f", {queries:.1f} queries/req" if queries is not None else "")
+            )
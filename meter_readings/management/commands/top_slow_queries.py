@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import re
+from logging.handlers import RotatingFileHandler
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_readings.profiling import SLOW_REQUEST_LOGGER
+
+
+def configured_log_file() -> str | None:
+    """The file the slow request logger writes to, from LOGGING."""
+    for handler in logging.getLogger(SLOW_REQUEST_LOGGER).handlers:
+        if isinstance(handler, RotatingFileHandler):
+            return handler.baseFilename
+    return None
+
+
+def log_files(path: str) -> list[str]:
+    """The log and its rotated copies (slow_requests.log.1, .2, ...), oldest first."""
+    directory = os.path.dirname(path) or "."
+    name = os.path.basename(path)
+    pattern = re.compile(re.escape(name) + r"\.(\d+)$")
+    rotated = []
+    if os.path.isdir(directory):
+        for entry in os.listdir(directory):
+            match = pattern.match(entry)
+            if match:
+                rotated.append((int(match.group(1)), os.path.join(directory, entry)))
+    files = [filepath for _, filepath in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+class Command(BaseCommand):
+    help = "Summarise the slow request log: the statements costing the most SQL time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log-file",
+            type=str,
+            help="Slow request log to read (default: the file configured in LOGGING). "
+                 "Rotated copies next to it are read too.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Number of statements to show"
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the latest EXPLAIN plan for each"
+        )
+
+    def handle(self, *args, **options):
+        path = options["log_file"] or configured_log_file()
+        if not path:
+            raise CommandError("No slow request log configured - pass --log-file")
+        files = log_files(path)
+        if not files:
+            raise CommandError(f"No slow request log found at {path}")
+
+        requests = 0
+        endpoints = {}
+        queries = {}
+        for filepath in files:
+            with open(filepath) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by rotation
+                    requests += 1
+                    endpoint = f"{entry['method']} {entry.get('route') or entry['path']}"
+                    stats = endpoints.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "sql_count": 0})
+                    stats["count"] += 1
+                    stats["total_ms"] += entry["total_ms"]
+                    stats["sql_count"] += entry["sql_count"]
+                    for query in entry["queries"]:
+                        stats = queries.setdefault(query["sql"], {
+                            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "endpoints": set(), "plan": None,
+                        })
+                        stats["count"] += 1
+                        stats["total_ms"] += query["ms"]
+                        stats["max_ms"] = max(stats["max_ms"], query["ms"])
+                        stats["endpoints"].add(endpoint)
+                        stats["plan"] = query.get("plan") or stats["plan"]
+
+        self.stdout.write(f"{requests} slow requests in {len(files)} file(s)\n")
+        self.stdout.write("Slowest endpoints:")
+        ranked = sorted(endpoints.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for endpoint, stats in ranked:
+            self.stdout.write(
+                f"  {endpoint}: {stats['count']} requests, "
+                f"mean {stats['total_ms'] / stats['count']:.1f} ms, "
+                f"mean {stats['sql_count'] / stats['count']:.1f} queries"
+            )
+
+        self.stdout.write(f"\nTop {options['limit']} statements by total time:")
+        ranked = sorted(queries.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for rank, (sql, stats) in enumerate(ranked[:options["limit"]], start=1):
+            self.stdout.write(
+                f"{rank}. {stats['total_ms']:.1f} ms total, {stats['count']}x, "
+                f"max {stats['max_ms']:.1f} ms - {', '.join(sorted(stats['endpoints']))}"
+            )
+            self.stdout.write(f"   {sql}")
+            if options["plans"] and stats["plan"]:
+                for line in stats["plan"]:
+                    self.stdout.write(f"     {line}")
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import shutil
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+
+from meter_readings.importer import atomic_import, import_flow_file
+from meter_readings.models import ProcessedFile
+from meter_readings.parser import iter_d0010_path
+
+
+def file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def move_into(filepath: str, directory: str) -> str:
+    """Move a file into a folder without overwriting anything already there."""
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.basename(filepath)
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        target = os.path.join(directory, f"{int(time.time() * 1000)}-{name}")
+    shutil.move(filepath, target)
+    return target
+
+
+class Command(BaseCommand):
+    help = "Watch a drop directory and import D0010 files as they arrive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=str, help="Directory to watch")
+        parser.add_argument(
+            "--done-dir",
+            type=str,
+            help="Where imported files are moved (default: <directory>/done)",
+        )
+        parser.add_argument(
+            "--failed-dir",
+            type=str,
+            help="Where files that fail to import are moved (default: <directory>/failed)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds between directory scans",
+        )
+        parser.add_argument(
+            "--settle",
+            type=float,
+            default=1.0,
+            help="Seconds a file must go unmodified before it's picked up, "
+                 "so we don't read one that's still being written",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Scan the directory once and exit",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not os.path.isdir(directory):
+            raise CommandError(f"{directory} is not a directory")
+
+        self.done_dir = options["done_dir"] or os.path.join(directory, "done")
+        self.failed_dir = options["failed_dir"] or os.path.join(directory, "failed")
+        self.settle = options["settle"]
+
+        if options["once"]:
+            self.scan(directory)
+            return
+
+        self.stdout.write(f"Watching {directory} every {options['interval']}s...")
+        try:
+            while True:
+                # long-running process - don't hold on to a dead connection
+                close_old_connections()
+                self.scan(directory)
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped watching")
+
+    def scan(self, directory: str):
+        """Import every settled file currently sitting in the directory."""
+        now = time.time()
+        ready = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                try:
+                    modified = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue  # removed since the listing
+                if now - modified >= self.settle:
+                    ready.append(entry.path)
+        for filepath in sorted(ready):
+            # one bad file (gone missing, unmovable, a database error)
+            # mustn't stop the watcher - it's retried on the next scan
+            try:
+                self.process_file(filepath)
+            except Exception as e:
+                self.stderr.write(
+                    self.style.ERROR(f"Error processing {os.path.basename(filepath)}: {e}")
+                )
+
+    def process_file(self, filepath: str):
+        """Import one file, record it in the ledger and move it out of the way."""
+        filename = os.path.basename(filepath)
+        size = os.path.getsize(filepath)
+        sha256 = file_sha256(filepath)
+
+        ledger = ProcessedFile.objects.filter(
+            filename=filename, size=size, sha256=sha256
+        ).first()
+        if ledger is not None and ledger.status == ProcessedFile.IMPORTED:
+            self.stdout.write(f"Skipping {filename}: already imported")
+            move_into(filepath, self.done_dir)
+            return
+
+        if ledger is None:
+            ledger = ProcessedFile(filename=filename, size=size, sha256=sha256)
+
+        try:
+            reading_count = 0
+            # the ledger's database outermost: unsharded it's the same
+            # transaction as the import, so a crash can't commit one without
+            # the other. Sharded, it commits just after the shards do.
+            with transaction.atomic():
+                # all of a zip's members or none, so a retry can't duplicate
+                # the members that went in before a bad one
+                with atomic_import():
+                    for parsed in iter_d0010_path(filepath):
+                        reading_count += import_flow_file(parsed)
+                    ledger.status = ProcessedFile.IMPORTED
+                    ledger.reading_count = reading_count
+                    ledger.error = ""
+                    ledger.save()
+        except Exception as e:
+            ledger.status = ProcessedFile.FAILED
+            ledger.error = str(e)
+            ledger.save()
+            move_into(filepath, self.failed_dir)
+            self.stderr.write(self.style.ERROR(f"Failed to import {filename}: {e}"))
+            return
+
+        move_into(filepath, self.done_dir)
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {reading_count} readings from {filename}")
+        )
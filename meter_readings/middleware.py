@@ -0,0 +1,47 @@
+"""Lighter middleware stack for token-authenticated API calls.
+
+Session, auth and message middleware only matter to browser clients. These
+wrappers skip them for /api/ requests carrying a signed token (apart from
+login and logout, which work on the session itself), so polling
+clients don't pay for a session load or a user lookup. DRF sets
+request.user itself from the token. Everything else, including the admin
+and cookie-based API calls, goes through the wrapped middleware as usual.
+"""
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+
+from meter_readings.authentication import has_token_header
+
+
+API_PREFIX = '/api/'
+
+# these log a browser session in or out, so they need it even with a token
+SESSION_PATHS = {'/api/login/', '/api/logout/'}
+
+
+def is_token_api_request(request) -> bool:
+    return (
+        request.path.startswith(API_PREFIX)
+        and request.path not in SESSION_PATHS
+        and has_token_header(request)
+    )
+
+
+class SkipForTokenAPIMixin:
+    def __call__(self, request):
+        if is_token_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class APISessionMiddleware(SkipForTokenAPIMixin, SessionMiddleware):
+    pass
+
+
+class APIAuthenticationMiddleware(SkipForTokenAPIMixin, AuthenticationMiddleware):
+    pass
+
+
+class APIMessageMiddleware(SkipForTokenAPIMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-19 19:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestRegisterReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mpan', models.CharField(max_length=13)),
+                ('serial_number', models.CharField(max_length=20)),
+                ('register_id', models.CharField(max_length=5)),
+                ('reading_date', models.DateTimeField()),
+                ('value', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('reading_type', models.CharField(blank=True, max_length=1)),
+                ('is_estimated', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reading', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='meter_readings.reading')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='latestregisterreading',
+            constraint=models.UniqueConstraint(fields=('mpan', 'serial_number', 'register_id'), name='unique_latest_register_reading'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.28 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0002_latest_register_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('imported', 'Imported'), ('failed', 'Failed')], max_length=10)),
+                ('reading_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='processedfile',
+            constraint=models.UniqueConstraint(fields=('filename', 'size', 'sha256'), name='unique_processed_file'),
+        ),
+    ]
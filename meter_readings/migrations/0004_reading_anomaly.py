@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-19 19:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0003_processed_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('regression', 'Reading went backwards'), ('jump', 'Implausible jump'), ('duplicate', 'Duplicate register read')], max_length=10)),
+                ('mpan', models.CharField(db_index=True, max_length=13)),
+                ('serial_number', models.CharField(max_length=20)),
+                ('previous_value', models.DecimalField(decimal_places=1, max_digits=10, null=True)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('previous_reading', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='meter_readings.reading')),
+                ('reading', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='meter_readings.reading')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='readinganomaly',
+            constraint=models.UniqueConstraint(fields=('reading', 'kind'), name='unique_reading_anomaly'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0004_reading_anomaly'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='meter',
+            name='serial_number',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='meterpoint',
+            name='mpan',
+            field=models.CharField(db_index=True, max_length=13),
+        ),
+        migrations.AlterField(
+            model_name='reading',
+            name='reading_date',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
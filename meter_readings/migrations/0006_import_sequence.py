@@ -0,0 +1,57 @@
+# Generated by Django 4.2.28 on 2026-10-19 20:05
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_import_seq(apps, schema_editor):
+    # files already imported get their id as their sequence number, which
+    # keeps them in import order ahead of anything imported from now on
+    alias = schema_editor.connection.alias
+    FlowFile = apps.get_model('meter_readings', 'FlowFile')
+    MeterPoint = apps.get_model('meter_readings', 'MeterPoint')
+    Reading = apps.get_model('meter_readings', 'Reading')
+    ImportSequence = apps.get_model('meter_readings', 'ImportSequence')
+
+    FlowFile.objects.using(alias).update(import_seq=F('id'))
+    Reading.objects.using(alias).update(import_seq=Subquery(
+        MeterPoint.objects.using(alias).filter(meters=OuterRef('meter_id')).values('flow_file_id')[:1]
+    ))
+    last = FlowFile.objects.using(alias).order_by('-id').values_list('id', flat=True).first()
+    ImportSequence.objects.using(alias).create(pk=1, value=last or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0005_search_and_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flowfile',
+            name='import_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='reading',
+            name='import_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='reading',
+            index=models.Index(fields=['import_seq', 'id'], name='reading_import_seq_idx'),
+        ),
+        migrations.RunPython(
+            backfill_import_seq,
+            migrations.RunPython.noop,
+            hints={'model_name': 'importsequence'},
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.28 on 2026-10-19 20:14
+
+from django.db import migrations, models
+import uuid
+
+
+def give_each_file_an_import_id(apps, schema_editor):
+    # a default on AddField would give every existing row the same uuid.
+    # rows already split across shards can't be matched up from here, so
+    # each one counts as its own import
+    alias = schema_editor.connection.alias
+    FlowFile = apps.get_model('meter_readings', 'FlowFile')
+    for pk in FlowFile.objects.using(alias).values_list('pk', flat=True):
+        FlowFile.objects.using(alias).filter(pk=pk).update(import_id=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_readings', '0006_import_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flowfile',
+            name='import_id',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.RunPython(
+            give_each_file_an_import_id,
+            migrations.RunPython.noop,
+            hints={'model_name': 'flowfile'},
+        ),
+        migrations.AlterField(
+            model_name='flowfile',
+            name='import_id',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -6,6 +8,11 @@ class FlowFile(models.Model):
     filename = models.CharField(max_length=255)
     file_header_id = models.CharField(max_length=20)  # from ZHV header row
     imported_at = models.DateTimeField(auto_now_add=True)
+    # position in this database's import order, see ImportSequence
+    import_seq = models.BigIntegerField(default=0, db_index=True)
+    # shared by the rows one import leaves on each shard, so they can be
+    # merged back into one file (ids and import_seq are per database)
+    import_id = models.UUIDField(default=uuid.uuid4, db_index=True)
 
     def __str__(self):
         return self.filename
@@ -17,7 +24,7 @@ class MeterPoint(models.Model):
     flow_file = models.ForeignKey(
         FlowFile, on_delete=models.CASCADE, related_name='meter_points'
     )
-    mpan = models.CharField(max_length=13)  # 13-digit meter point admin number
+    mpan = models.CharField(max_length=13, db_index=True)  # 13-digit meter point admin number
     validation_status = models.CharField(max_length=1)
 
     def __str__(self):
@@ -29,7 +36,7 @@ class Meter(models.Model):
     meter_point = models.ForeignKey(
         MeterPoint, on_delete=models.CASCADE, related_name='meters'
     )
-    serial_number = models.CharField(max_length=20)
+    serial_number = models.CharField(max_length=20, db_index=True)
     meter_type = models.CharField(max_length=1)  # C = current, D = disconnected
 
     def __str__(self):
@@ -43,10 +50,128 @@ class Reading(models.Model):
         Meter, on_delete=models.CASCADE, related_name='readings'
     )
     register_id = models.CharField(max_length=5)  # 01 = day, 02 = night
+    reading_date = models.DateTimeField(db_index=True)
+    value = models.DecimalField(max_digits=10, decimal_places=1)
+    reading_type = models.CharField(max_length=1, blank=True)
+    is_estimated = models.BooleanField(default=False)
+    # copied from the flow file so the change feed can page on (import_seq, id)
+    import_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['import_seq', 'id'], name='reading_import_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.meter.serial_number} - {self.value} on {self.reading_date}"
+
+
+class LatestRegisterReading(models.Model):
+    """Most recent reading for each register on a meter, kept up to date by
+    the importer so "what's the current read" is one indexed lookup rather
+    than a scan through the meter's whole history.
+    Keyed by MPAN + serial rather than FK because every import creates new
+    MeterPoint/Meter rows for the same physical meter."""
+    mpan = models.CharField(max_length=13)
+    serial_number = models.CharField(max_length=20)
+    register_id = models.CharField(max_length=5)
+    # deleting the read drops the row - the admin recomputes the register
+    # straight after (MeterDataAdmin), other deletes need rebuild_latest_readings
+    reading = models.ForeignKey(
+        Reading, on_delete=models.CASCADE, related_name='+'
+    )
     reading_date = models.DateTimeField()
     value = models.DecimalField(max_digits=10, decimal_places=1)
     reading_type = models.CharField(max_length=1, blank=True)
     is_estimated = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # also the index behind the per-MPAN lookup (mpan is the leading column)
+            models.UniqueConstraint(
+                fields=['mpan', 'serial_number', 'register_id'],
+                name='unique_latest_register_reading',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.mpan} {self.serial_number} {self.register_id}: {self.value} on {self.reading_date}"
+
+
+class ProcessedFile(models.Model):
+    """Ledger of files picked up from the watched drop directory, so a file
+    dropped twice (same name, size and content) is only imported once."""
+    IMPORTED = 'imported'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (IMPORTED, 'Imported'),
+        (FAILED, 'Failed'),
+    ]
+
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    reading_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['filename', 'size', 'sha256'],
+                name='unique_processed_file',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class ReadingAnomaly(models.Model):
+    """A reading that looks wrong compared with the read before it on the
+    same register. Filled in by the validation stage after each import."""
+    REGRESSION = 'regression'
+    JUMP = 'jump'
+    DUPLICATE = 'duplicate'
+    KIND_CHOICES = [
+        (REGRESSION, 'Reading went backwards'),
+        (JUMP, 'Implausible jump'),
+        (DUPLICATE, 'Duplicate register read'),
+    ]
+
+    reading = models.ForeignKey(
+        Reading, on_delete=models.CASCADE, related_name='anomalies'
+    )
+    previous_reading = models.ForeignKey(
+        Reading, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # copied from the meter so the API can filter without the join chain
+    mpan = models.CharField(max_length=13, db_index=True)
+    serial_number = models.CharField(max_length=20)
+    previous_value = models.DecimalField(max_digits=10, decimal_places=1, null=True)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reading', 'kind'],
+                name='unique_reading_anomaly',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} on {self.mpan} {self.serial_number}"
+
+
+class ImportSequence(models.Model):
+    """Single-row counter handing out import_seq values on its database.
+    The importer bumps it inside the import transaction, which holds the row
+    lock until commit, so imports become visible in import_seq order and a
+    consumer that has seen N can't later miss a file numbered below N."""
+    value = models.BigIntegerField(default=0)
 
     def __str__(self):
-        return f"{self.meter.serial_number} - {self.value} on {self.reading_date}"
\ No newline at end of file
+        return str(self.value)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import io
+import os
 from datetime import datetime
 from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator
 
 
 # dataclasses to hold parsed data before saving to db
@@ -42,81 +45,174 @@ def parse_date(date_string: str) -> datetime:
 
 
 def parse_d0010_file(filepath: str) -> FlowFileData:
-    """Parse a D0010 flow file and return structured data.
+    """Parse a single D0010 flow file and return structured data.
+    The file can be plain text or gzip/zstd/zip compressed - archives
+    holding more than one flow file should go through iter_d0010_path."""
+    flow_files = iter_d0010_path(filepath)
+    flow_file = next(flow_files, None)
+    if flow_file is None:
+        raise ValueError("No D0010 file found in archive")
+    if next(flow_files, None) is not None:
+        raise ValueError("Archive holds more than one D0010 file")
+    return flow_file
+
+
+def parse_d0010_lines(lines: Iterable[str], filename: str) -> FlowFileData:
+    """Parse the lines of a D0010 flow file and return structured data.
     Uses a state machine approach - tracks which meter point and meter
     we're currently inside so readings get attached to the right parent."""
-    import os
-    filename = os.path.basename(filepath)
-
     flow_file = None
     current_meter_point = None
     current_meter = None
 
-    with open(filepath, "r") as f:
-        for line_number, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-
-            fields = line.split("|")
-            row_type = fields[0].strip()
-
-            if row_type == "ZHV":
-                # file header - grab the sequence id
-                file_header_id = fields[1].strip()
-                flow_file = FlowFileData(
-                    filename=filename,
-                    file_header_id=file_header_id,
-                )
-
-            elif row_type == "026":
-                # new meter point - reset current meter
-                if flow_file is None:
-                    raise ValueError(f"Line {line_number}: Found 026 row before ZHV header")
-                mpan = fields[1].strip()
-                validation_status = fields[2].strip()
-                current_meter_point = MeterPointData(
-                    mpan=mpan,
-                    validation_status=validation_status,
-                )
-                flow_file.meter_points.append(current_meter_point)
-                current_meter = None  # important - new meter point means no meter yet
-
-            elif row_type == "028":
-                # physical meter under current meter point
-                if current_meter_point is None:
-                    raise ValueError(f"Line {line_number}: Found 028 row before any 026 row")
-                serial_number = fields[1].strip()
-                meter_type = fields[2].strip()
-                current_meter = MeterData(
-                    serial_number=serial_number,
-                    meter_type=meter_type,
-                )
-                current_meter_point.meters.append(current_meter)
-
-            elif row_type == "030":
-                # reading - attach to whatever meter is current
-                # multiple 030s in a row = multiple registers on same meter
-                if current_meter is None:
-                    raise ValueError(f"Line {line_number}: Found 030 row before any 028 row")
-                register_id = fields[1].strip()
-                reading_date = parse_date(fields[2].strip())
-                value = fields[3].strip()
-                reading_type = fields[6].strip() if len(fields) > 6 else ""
-                is_estimated = fields[7].strip() == "E" if len(fields) > 7 else False
-                reading = ReadingData(
-                    register_id=register_id,
-                    reading_date=reading_date,
-                    value=value,
-                    reading_type=reading_type,
-                    is_estimated=is_estimated,
-                )
-                current_meter.readings.append(reading)
-
-            elif row_type == "ZPT":
-                pass  # footer - nothing useful here
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        fields = line.split("|")
+        row_type = fields[0].strip()
+
+        if row_type == "ZHV":
+            # file header - grab the sequence id
+            file_header_id = fields[1].strip()
+            flow_file = FlowFileData(
+                filename=filename,
+                file_header_id=file_header_id,
+            )
+
+        elif row_type == "026":
+            # new meter point - reset current meter
+            if flow_file is None:
+                raise ValueError(f"Line {line_number}: Found 026 row before ZHV header")
+            mpan = fields[1].strip()
+            validation_status = fields[2].strip()
+            current_meter_point = MeterPointData(
+                mpan=mpan,
+                validation_status=validation_status,
+            )
+            flow_file.meter_points.append(current_meter_point)
+            current_meter = None  # important - new meter point means no meter yet
+
+        elif row_type == "028":
+            # physical meter under current meter point
+            if current_meter_point is None:
+                raise ValueError(f"Line {line_number}: Found 028 row before any 026 row")
+            serial_number = fields[1].strip()
+            meter_type = fields[2].strip()
+            current_meter = MeterData(
+                serial_number=serial_number,
+                meter_type=meter_type,
+            )
+            current_meter_point.meters.append(current_meter)
+
+        elif row_type == "030":
+            # reading - attach to whatever meter is current
+            # multiple 030s in a row = multiple registers on same meter
+            if current_meter is None:
+                raise ValueError(f"Line {line_number}: Found 030 row before any 028 row")
+            register_id = fields[1].strip()
+            reading_date = parse_date(fields[2].strip())
+            value = fields[3].strip()
+            reading_type = fields[6].strip() if len(fields) > 6 else ""
+            is_estimated = fields[7].strip() == "E" if len(fields) > 7 else False
+            reading = ReadingData(
+                register_id=register_id,
+                reading_date=reading_date,
+                value=value,
+                reading_type=reading_type,
+                is_estimated=is_estimated,
+            )
+            current_meter.readings.append(reading)
+
+        elif row_type == "ZPT":
+            pass  # footer - nothing useful here
 
     if flow_file is None:
         raise ValueError("No ZHV header found in file")
 
-    return flow_file
\ No newline at end of file
+    return flow_file
+
+
+# magic bytes at the start of each compressed format we accept
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".zip")
+
+
+def detect_compression(fileobj: BinaryIO) -> str | None:
+    """Sniff the compression format from the first few bytes.
+    Rewinds the stream afterwards so it can be read from the start."""
+    header = fileobj.read(4)
+    fileobj.seek(0)
+    if header.startswith(GZIP_MAGIC):
+        return "gzip"
+    if header.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if header.startswith(ZIP_MAGIC):
+        return "zip"
+    return None
+
+
+def strip_compression_suffix(filename: str) -> str:
+    """sample.uff.gz -> sample.uff, so the stored filename is the flow file's own."""
+    root, ext = os.path.splitext(filename)
+    if ext.lower() in COMPRESSED_SUFFIXES:
+        return root
+    return filename
+
+
+def _open_zstd(fileobj: BinaryIO) -> BinaryIO:
+    # zstandard is optional - only needed if collectors actually send .zst files
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compressed files need the zstandard package installed")
+    # closefd=False: like gzip and zip, leave the caller's stream open
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False))
+
+
+def _parse_binary(raw: BinaryIO, filename: str) -> FlowFileData:
+    # decode on the fly rather than reading the whole file into memory
+    text = io.TextIOWrapper(raw)
+    try:
+        return parse_d0010_lines(text, filename)
+    finally:
+        text.detach()  # leave closing the underlying stream to its owner
+
+
+def iter_d0010_fileobj(fileobj: BinaryIO, filename: str) -> Iterator[FlowFileData]:
+    """Parse every D0010 file in a binary file object, decompressing as we read.
+    Plain, gzip and zstd input yield a single file; zip archives yield one
+    per member so a big archive never has to be unpacked to disk."""
+    compression = detect_compression(fileobj)
+
+    # gzip/zipfile pull in zlib, bz2 and lzma, so only import them when needed
+    if compression == "zip":
+        import zipfile
+        with zipfile.ZipFile(fileobj) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                with archive.open(member) as raw:
+                    yield _parse_binary(raw, os.path.basename(member.filename))
+        return
+
+    filename = strip_compression_suffix(filename)
+    if compression == "gzip":
+        import gzip
+        with gzip.GzipFile(fileobj=fileobj, mode="rb") as raw:
+            yield _parse_binary(raw, filename)
+    elif compression == "zstd":
+        with _open_zstd(fileobj) as raw:
+            yield _parse_binary(raw, filename)
+    else:
+        yield _parse_binary(fileobj, filename)
+
+
+def iter_d0010_path(filepath: str) -> Iterator[FlowFileData]:
+    """Open a file on disk and parse every D0010 file it holds."""
+    with open(filepath, "rb") as f:
+        yield from iter_d0010_fileobj(f, os.path.basename(filepath))
@@ -0,0 +1,200 @@
+"""Sampled SQL profiling for API requests.
+
+QueryProfilingMiddleware wraps a sample of /api/ requests: every statement
+run on the default database and the shards is counted and timed, and time
+spent serialising the response is tracked in a "serialize" section. The
+totals go back in a Server-Timing header. A request slower than
+SLOW_REQUEST_MS is also written as one JSON line to the
+meter_readings.slow_requests logger (a rotating file, see LOGGING), with
+its slowest statements and their EXPLAIN plans - `top_slow_queries`
+summarises that log.
+
+Unsampled requests skip all of this, and with SAMPLE_RATE at 0 the
+middleware drops itself from the stack at startup.
+"""
+import heapq
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from meter_readings.middleware import API_PREFIX
+from meter_readings.sharding import shard_aliases
+
+
+SLOW_REQUEST_LOGGER = 'meter_readings.slow_requests'
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,  # fraction of /api/ requests profiled
+    'SLOW_REQUEST_MS': 500,  # requests at least this slow are logged
+    'SLOWEST_QUERIES': 5,  # statements kept per request
+    'EXPLAIN': True,  # attach plans for the slowest SELECTs in the log
+}
+
+logger = logging.getLogger(SLOW_REQUEST_LOGGER)
+
+_current = ContextVar('query_profile', default=None)
+
+
+def profiling_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'QUERY_PROFILING', {})}[name]
+
+
+def normalise_sql(sql: str) -> str:
+    """Collapse IN lists so the same query with a different number of
+    parameters groups together."""
+    return re.sub(r'%s(?:\s*,\s*%s)+', '%s, ...', sql)
+
+
+@contextmanager
+def section(name: str):
+    """Time a block into the current request's profile, if it has one."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.sections[name] += time.perf_counter() - start
+
+
+class RequestProfile:
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.slowest = []  # min-heap of (seconds, seq, alias, sql, params)
+        self.sections = defaultdict(float)
+        self.total = 0.0
+
+    def wrapper(self, alias: str):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.record(alias, sql, None if many else params, time.perf_counter() - start)
+        return record
+
+    def record(self, alias, sql, params, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        self.statements[sql] += 1
+        entry = (duration, self.sql_count, alias, sql, params)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    @contextmanager
+    def capture(self):
+        aliases = dict.fromkeys([DEFAULT_DB_ALIAS, *shard_aliases()])
+        with ExitStack() as stack:
+            for alias in aliases:
+                stack.enter_context(connections[alias].execute_wrapper(self.wrapper(alias)))
+            yield
+
+    def server_timing(self) -> str:
+        metrics = [f'sql;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"']
+        metrics += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.sections.items()]
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def log_entry(self, request, response, explain: bool) -> dict:
+        repeated = Counter()
+        for sql, count in self.statements.items():
+            repeated[normalise_sql(sql)] += count
+        return {
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'route': getattr(request.resolver_match, 'route', None),
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 1),
+            'sql_ms': round(self.sql_time * 1000, 1),
+            'sql_count': self.sql_count,
+            'sections': {name: round(seconds * 1000, 1) for name, seconds in self.sections.items()},
+            # the same statement run over and over usually means an N+1
+            'repeated': [
+                {'sql': sql, 'count': count}
+                for sql, count in repeated.most_common(3) if count > 1
+            ],
+            # parameters stay out of the log, they can hold MPANs
+            'queries': [
+                {
+                    'alias': alias,
+                    'sql': normalise_sql(sql),
+                    'ms': round(duration * 1000, 1),
+                    'plan': explain_query(alias, sql, params) if explain else None,
+                }
+                for duration, _, alias, sql, params in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+def explain_query(alias: str, sql: str, params) -> list[str] | None:
+    """The database's plan for a statement, or None if it can't be explained."""
+    connection = connections[alias]
+    if params is None or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    if not connection.features.supports_explaining_query_execution:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except DatabaseError as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+class QueryProfilingMiddleware:
+    """Goes first in MIDDLEWARE so the total covers the whole stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = profiling_setting('SAMPLE_RATE')
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.slow_ms = profiling_setting('SLOW_REQUEST_MS')
+        self.keep = profiling_setting('SLOWEST_QUERIES')
+        self.explain = profiling_setting('EXPLAIN')
+
+    def __call__(self, request):
+        if not request.path.startswith(API_PREFIX) or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile(self.keep)
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with profile.capture():
+                response = self.get_response(request)
+        finally:
+            profile.total = time.perf_counter() - start
+            _current.reset(token)
+
+        response['Server-Timing'] = profile.server_timing()
+        if profile.total * 1000 >= self.slow_ms:
+            logger.info(json.dumps(profile.log_entry(request, response, self.explain)))
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that counts towards the profile's serialize section."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with section('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
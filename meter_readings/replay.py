@@ -0,0 +1,250 @@
+"""Replay a recorded request log against the API and measure it.
+
+A log is JSON Lines, one request per line:
+
+    {"method": "GET", "path": "/api/readings/", "query": {"search": "F75A"}}
+    {"method": "POST", "path": "/api/token/", "body": {"username": "...", "password": "..."}}
+
+"query" may be a dict or a query string, "body" a dict (sent as JSON) or
+a string, and "headers" a dict of extra request headers. Lines without a
+"path" are skipped.
+
+Requests run either in-process through Django's test client, which also
+counts DB queries, or against a running server over HTTP.
+"""
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
+
+from meter_readings.sharding import shard_aliases
+
+
+@dataclass
+class LoggedRequest:
+    method: str
+    path: str
+    query: str = ''
+    body: object = None
+    headers: dict = None
+
+
+# status recorded when a request got no response at all
+NO_RESPONSE = 0
+
+
+@dataclass
+class Result:
+    endpoint: str  # "GET /api/meter-points/<str:mpan>/"
+    status: int
+    latency: float  # seconds
+    queries: int | None = None  # only known in-process
+
+
+def load_log(filepath: str) -> list[LoggedRequest]:
+    requests = []
+    with open(filepath) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Line {line_number}: not valid JSON ({e})")
+            if not isinstance(entry, dict) or 'path' not in entry:
+                continue
+            query = entry.get('query') or ''
+            if isinstance(query, dict):
+                query = urllib.parse.urlencode(query, doseq=True)
+            requests.append(LoggedRequest(
+                method=entry.get('method', 'GET').upper(),
+                path=entry['path'],
+                query=query,
+                body=entry.get('body'),
+                headers=entry.get('headers') or {},
+            ))
+    return requests
+
+
+def endpoint_for(path: str) -> str:
+    """Group requests by URL pattern, so every MPAN's detail page counts as
+    one endpoint rather than thousands."""
+    try:
+        route = resolve(path).route
+    except Resolver404:
+        return path
+    return '/' + route
+
+
+def _encode_body(body):
+    if body is None:
+        return None, None
+    if isinstance(body, (dict, list)):
+        return json.dumps(body), 'application/json'
+    return str(body), 'text/plain'
+
+
+def _default_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+class InProcessTarget:
+    """Sends requests through the Django test client, one client per thread."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.host = _default_host()
+        # every database a request might query
+        self.aliases = sorted({DEFAULT_DB_ALIAS, *shard_aliases()})
+
+    def send(self, request: LoggedRequest) -> tuple[int, int]:
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            # a view that raises becomes a 500 in the report, like it would
+            # behind a real server, instead of ending the replay
+            client = self.local.client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+        data, content_type = _encode_body(request.body)
+        extra = {
+            'HTTP_' + name.upper().replace('-', '_'): value
+            for name, value in request.headers.items()
+        }
+        path = f"{request.path}?{request.query}" if request.query else request.path
+
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in self.aliases
+            ]
+            response = client.generic(
+                request.method, path, data or '',
+                content_type=content_type or 'application/octet-stream', **extra
+            )
+        return response.status_code, sum(len(c.captured_queries) for c in captured)
+
+
+class HTTPTarget:
+    """Sends requests to a running server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request: LoggedRequest) -> tuple[int, None]:
+        url = self.base_url + request.path
+        if request.query:
+            url += '?' + request.query
+        data, content_type = _encode_body(request.body)
+        headers = dict(request.headers)
+        if content_type:
+            headers['Content-Type'] = content_type
+        http_request = urllib.request.Request(
+            url,
+            data=data.encode() if data is not None else None,
+            headers=headers,
+            method=request.method,
+        )
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, OSError):
+            # refused, reset or timed out - counted as an error, not fatal
+            return NO_RESPONSE, None
+
+
+def replay(requests, target, concurrency: int = 1, rate: float = 0) -> tuple[list[Result], float]:
+    """Send every request and time it. `rate` caps requests per second
+    across all workers (0 = as fast as possible).
+    Returns the results and the wall-clock duration."""
+    start = time.perf_counter()
+
+    def run(indexed):
+        index, request = indexed
+        if rate:
+            delay = start + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent = time.perf_counter()
+        status, queries = target.send(request)
+        latency = time.perf_counter() - sent
+        return Result(f"{request.method} {endpoint_for(request.path)}", status, latency, queries)
+
+    if concurrency == 1:
+        # stay on this thread and its database connection
+        results = [run(indexed) for indexed in enumerate(requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(run, enumerate(requests)))
+    return results, time.perf_counter() - start
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarise(results: list[Result], duration: float) -> dict:
+    by_endpoint = defaultdict(list)
+    for result in results:
+        by_endpoint[result.endpoint].append(result)
+
+    endpoints = {}
+    for endpoint, endpoint_results in sorted(by_endpoint.items()):
+        latencies = sorted(r.latency * 1000 for r in endpoint_results)
+        queries = [r.queries for r in endpoint_results if r.queries is not None]
+        endpoints[endpoint] = {
+            'requests': len(endpoint_results),
+            'errors': sum(1 for r in endpoint_results if r.status >= 400 or r.status == NO_RESPONSE),
+            'throughput_rps': len(endpoint_results) / duration if duration else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p90_ms': percentile(latencies, 90),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1],
+            'avg_queries': sum(queries) / len(queries) if queries else None,
+        }
+    return {
+        'requests': len(results),
+        'duration_s': duration,
+        'throughput_rps': len(results) / duration if duration else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def compare(current: dict, previous: dict, threshold: float) -> list[str]:
+    """Endpoints that got slower or chattier than `threshold` (0.2 = 20%)."""
+    regressions = []
+    for endpoint, now in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(endpoint)
+        if before is None:
+            continue
+        if before['p90_ms'] and now['p90_ms'] > before['p90_ms'] * (1 + threshold):
+            regressions.append(
+                f"{endpoint}: p90 {before['p90_ms']:.1f} ms -> {now['p90_ms']:.1f} ms"
+            )
+        if before.get('avg_queries') is not None and now.get('avg_queries') is not None \
+                and now['avg_queries'] > before['avg_queries']:
+            regressions.append(
+                f"{endpoint}: queries {before['avg_queries']:.1f} -> {now['avg_queries']:.1f} per request"
+            )
+    return regressions
@@ -1,5 +1,12 @@
 from rest_framework import serializers
-from meter_readings.models import FlowFile, MeterPoint, Meter, Reading
+from meter_readings.models import (
+    FlowFile,
+    MeterPoint,
+    Meter,
+    Reading,
+    LatestRegisterReading,
+    ReadingAnomaly,
+)
 
 
 class ReadingSerializer(serializers.ModelSerializer):
@@ -48,7 +55,24 @@ class FlowFileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = FlowFile
-        fields = ['id', 'filename', 'file_header_id', 'imported_at', 'meter_point_count', 'reading_count']
+        fields = ['id', 'import_id', 'filename', 'file_header_id', 'imported_at', 'meter_point_count', 'reading_count']
+
+
+class LatestRegisterReadingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LatestRegisterReading
+        fields = ['mpan', 'serial_number', 'register_id', 'reading_date', 'value', 'reading_type', 'is_estimated', 'reading']
+
+
+class ReadingAnomalySerializer(serializers.ModelSerializer):
+    register_id = serializers.CharField(source='reading.register_id')
+    reading_date = serializers.DateTimeField(source='reading.reading_date')
+    value = serializers.DecimalField(source='reading.value', max_digits=10, decimal_places=1)
+    filename = serializers.CharField(source='reading.meter.meter_point.flow_file.filename')
+
+    class Meta:
+        model = ReadingAnomaly
+        fields = ['id', 'kind', 'mpan', 'serial_number', 'register_id', 'reading_date', 'value', 'previous_value', 'reading', 'previous_reading', 'filename', 'detected_at']
 
 
 class StatsSerializer(serializers.Serializer):
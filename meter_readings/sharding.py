@@ -0,0 +1,86 @@
+"""Spread meter data over several databases by MPAN.
+
+With READING_SHARDS set, FlowFile, MeterPoint, Meter, Reading and the
+tables derived from them live on the shard databases. An MPAN always hashes
+to the same shard, and each shard holds its own FlowFile row for the part
+of a file that landed on it. Everything else (auth, sessions, admin, the
+import ledger) stays on the default database. With READING_SHARDS empty
+every helper here resolves to the default database, so unsharded
+deployments behave as before.
+
+Code touching meter data picks its database explicitly: shard_for_mpan()
+for single-meter lookups, shard_aliases() to scatter a query to every shard
+and merge the results.
+"""
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# MPANs per query when filtering on a list of them - keeps IN (...) lists
+# under SQLite's bound-parameter limit
+MPAN_BATCH_SIZE = 500
+
+SHARDED_MODELS = {
+    'flowfile',
+    'meterpoint',
+    'meter',
+    'reading',
+    'latestregisterreading',
+    'readinganomaly',
+    'importsequence',
+}
+
+
+def sharding_enabled() -> bool:
+    """True when meter data lives on the shards rather than the default database."""
+    return bool(getattr(settings, 'READING_SHARDS', None))
+
+
+def shard_aliases() -> list[str]:
+    """Every database holding meter data."""
+    return list(getattr(settings, 'READING_SHARDS', None) or [DEFAULT_DB_ALIAS])
+
+
+def shard_for_mpan(mpan: str) -> str:
+    """Database holding a meter point. crc32 rather than hash() so the
+    mapping is stable across processes."""
+    aliases = shard_aliases()
+    return aliases[zlib.crc32(mpan.encode()) % len(aliases)]
+
+
+def group_by_shard(items, mpan_of) -> dict:
+    """Split items into {alias: [items]} using mpan_of(item) to place each.
+    Always returns at least one group so callers still write file-level rows
+    for a file with no meter points."""
+    groups = defaultdict(list)
+    for item in items:
+        groups[shard_for_mpan(mpan_of(item))].append(item)
+    return dict(groups) or {shard_aliases()[0]: []}
+
+
+def scatter(queryset) -> list:
+    """The same queryset bound to each shard."""
+    return [queryset.using(alias) for alias in shard_aliases()]
+
+
+class ShardRouter:
+    """Keeps meter data tables on the shards and everything else off them.
+    Reads and writes aren't routed here - a query can't say which MPAN it's
+    for, so callers choose the database with .using()."""
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # foreign keys can't cross databases
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        shards = getattr(settings, 'READING_SHARDS', None)
+        if not shards:
+            return None
+        if app_label == 'meter_readings' and model_name in SHARDED_MODELS:
+            return db in shards
+        if db in shards:
+            return False
+        return None
@@ -0,0 +1,28 @@
+"""D0010 content shared by the test modules."""
+from meter_readings.parser import parse_d0010_lines
+
+
+# two meter points, three readings - same shape as fixtures/sample.uff
+SAMPLE_D0010 = (
+    "ZHV|0000475656|D0010002|D|UDMS|X|MRCY|20160302153151||||OPER|\n"
+    "026|1200023305967|V|\n"
+    "028|F75A 00802|D|\n"
+    "030|S|20160222000000|56311.0|||T|N|\n"
+    "026|2200031930792|V|\n"
+    "028|S95 105423|C|\n"
+    "030|01|20160222000000|12345.0|||T|N|\n"
+    "030|02|20160222000000|6789.0|||T|N|\n"
+    "ZPT|0000475656|4||1|20160302153151|\n"
+)
+
+
+def flow_file(header_id, date, day_value, night_value):
+    """Economy7 meter point with a day and night register read on `date`."""
+    return parse_d0010_lines([
+        f"ZHV|{header_id}|D0010002|D|UDMS|X|MRCY|20160302153151||||OPER|",
+        "026|2200031930792|V|",
+        "028|S95 105423|C|",
+        f"030|01|{date}|{day_value}|||T|N|",
+        f"030|02|{date}|{night_value}|||T|N|",
+        "ZPT|0000475656|3||1|20160302153151|",
+    ], f"{header_id}.uff")
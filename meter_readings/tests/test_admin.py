@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from meter_readings.admin import ReadingAdmin
+from meter_readings.admin_tools import EstimatedCountPaginator
+from meter_readings.importer import import_flow_file
+from meter_readings.models import FlowFile, LatestRegisterReading, Reading
+from meter_readings.tests.helpers import flow_file
+
+
+CHANGELIST_URL = "/admin/meter_readings/reading/"
+
+
+class TestReadingAdmin(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20150222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        user = User.objects.create_superuser("support", "support@example.com", "pw")
+        self.client.force_login(user)
+
+    def listed_ids(self, response):
+        return [obj.pk for obj in response.context["cl"].result_list]
+
+    def test_changelist_loads_newest_first(self):
+        response = self.client.get(CHANGELIST_URL)
+        self.assertEqual(response.status_code, 200)
+        ids = self.listed_ids(response)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_search_is_exact_and_keeps_spaces(self):
+        response = self.client.get(CHANGELIST_URL, {"q": "S95 105423"})
+        self.assertEqual(len(self.listed_ids(response)), 4)
+
+        # partial matches no longer hit - they'd need a scan
+        response = self.client.get(CHANGELIST_URL, {"q": "S95"})
+        self.assertEqual(self.listed_ids(response), [])
+
+    def test_year_filter(self):
+        response = self.client.get(CHANGELIST_URL, {"reading_year": "2016"})
+        readings = response.context["cl"].result_list
+        self.assertEqual({r.reading_date.year for r in readings}, {2016})
+        self.assertEqual(len(readings), 2)
+
+    def test_keyset_cursor_continues_after_id(self):
+        newest = Reading.objects.order_by("-pk").first()
+        response = self.client.get(CHANGELIST_URL, {"id__lt": newest.pk})
+        ids = self.listed_ids(response)
+        self.assertNotIn(newest.pk, ids)
+        self.assertEqual(len(ids), 3)
+
+    def test_paginator_caps_filtered_count(self):
+        paginator = EstimatedCountPaginator(Reading.objects.filter(register_id="01").order_by("-id"), 1)
+        paginator.count_limit = 1
+        self.assertEqual(paginator.count, 1)
+
+    def test_paginator_estimates_unfiltered_count(self):
+        paginator = EstimatedCountPaginator(Reading.objects.order_by("-id"), 10)
+        self.assertEqual(paginator.count, Reading.objects.order_by("-pk").first().pk)
+
+    def test_full_page_links_to_older_rows(self):
+        with mock.patch.object(ReadingAdmin, "list_per_page", 2):
+            response = self.client.get(CHANGELIST_URL)
+        last_id = self.listed_ids(response)[-1]
+        self.assertIn(f"id__lt={last_id}", response.context["older_url"])
+
+    def test_no_keyset_links_when_sorted_by_a_column(self):
+        with mock.patch.object(ReadingAdmin, "list_per_page", 2):
+            response = self.client.get(CHANGELIST_URL, {"o": "5"})
+        self.assertEqual(len(self.listed_ids(response)), 2)
+        self.assertNotIn("older_url", response.context)
+
+        with mock.patch.object(ReadingAdmin, "list_per_page", 2):
+            response = self.client.get(CHANGELIST_URL, {"o": "5", "id__lt": 3})
+        self.assertNotIn("newest_url", response.context)
+
+
+class TestMeterDataAdminDelete(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20150222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        user = User.objects.create_superuser("support", "support@example.com", "pw")
+        self.client.force_login(user)
+
+    def latest_values(self):
+        return dict(LatestRegisterReading.objects.values_list("register_id", "value"))
+
+    def test_deleting_latest_read_falls_back_to_older_one(self):
+        newest = LatestRegisterReading.objects.get(register_id="01").reading
+        self.client.post(f"{CHANGELIST_URL}{newest.pk}/delete/", {"post": "yes"})
+
+        self.assertFalse(Reading.objects.filter(pk=newest.pk).exists())
+        self.assertEqual(str(self.latest_values()["01"]), "100.0")
+        self.assertEqual(str(self.latest_values()["02"]), "90.0")
+
+    def test_deleting_files_recomputes_their_registers(self):
+        newer = FlowFile.objects.get(file_header_id="2")
+        self.client.post("/admin/meter_readings/flowfile/", {
+            "action": "delete_selected", "_selected_action": [newer.pk], "post": "yes",
+        })
+        self.assertEqual({k: str(v) for k, v in self.latest_values().items()}, {"01": "100.0", "02": "50.0"})
+
+        older = FlowFile.objects.get()
+        self.client.post("/admin/meter_readings/flowfile/", {
+            "action": "delete_selected", "_selected_action": [older.pk], "post": "yes",
+        })
+        self.assertEqual(self.latest_values(), {})
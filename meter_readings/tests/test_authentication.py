@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from meter_readings.authentication import issue_token
+
+
+class TestSignedTokenAuthentication(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("poller", password="secret-pw")
+
+    def get_user(self, token):
+        return self.client.get("/api/user/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_token_endpoint_issues_working_token(self):
+        response = self.client.post("/api/token/", {"username": "poller", "password": "secret-pw"})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get_user(response.json()["token"])
+        self.assertEqual(response.json(), {"username": "poller"})
+
+    def test_token_endpoint_rejects_bad_password(self):
+        response = self.client.post("/api/token/", {"username": "poller", "password": "wrong"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_requests_never_touch_the_database(self):
+        token = issue_token(self.user)
+        with self.assertNumQueries(0):
+            response = self.get_user(token)
+        self.assertEqual(response.status_code, 200)
+
+    def test_tampered_token_is_rejected(self):
+        token = issue_token(self.user)
+        response = self.get_user(token[:-2] + "xx")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(API_TOKEN_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self):
+        response = self.get_user(issue_token(self.user))
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_login_still_works(self):
+        response = self.client.post("/api/login/", {"username": "poller", "password": "secret-pw"})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/api/user/")
+        self.assertEqual(response.json(), {"username": "poller"})
+
+    def test_login_and_logout_with_token_header(self):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {issue_token(self.user)}"}
+        response = self.client.post(
+            "/api/login/", {"username": "poller", "password": "secret-pw"}, **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post("/api/logout/", **headers)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from meter_readings.changes import changes_page, decode_cursor
+from meter_readings.importer import import_flow_file
+from meter_readings.models import FlowFile, Reading
+from meter_readings.tests.helpers import flow_file
+
+
+class TestChangeFeed(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.5", "90.0"))
+
+    def test_imports_take_increasing_sequence_numbers(self):
+        first, second = FlowFile.objects.order_by("id")
+        self.assertGreater(second.import_seq, first.import_seq)
+        self.assertEqual(
+            set(Reading.objects.filter(meter__meter_point__flow_file=second).values_list("import_seq", flat=True)),
+            {second.import_seq},
+        )
+
+    def test_feed_pages_through_everything_once(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get("/api/changes/", {"since": cursor or "", "page_size": 3})
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 3)
+            seen += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(seen, list(Reading.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_only_new_readings_after_cursor(self):
+        _, cursor, has_more = changes_page(None)
+        self.assertFalse(has_more)
+        self.assertEqual(changes_page(cursor)[0], [])
+
+        import_flow_file(flow_file("3", "20160422000000", "250.0", "120.0"))
+        rows, next_cursor, _ = changes_page(cursor)
+        self.assertEqual(sorted(str(row["value"]) for row in rows), ["120.0", "250.0"])
+        self.assertEqual({row["filename"] for row in rows}, {"3.uff"})
+        self.assertNotEqual(next_cursor, cursor)
+
+    def test_rows_match_reading_payload(self):
+        row = self.client.get("/api/changes/").json()["results"][0]
+        self.assertEqual(
+            set(row),
+            {"id", "mpan", "serial_number", "register_id", "reading_date", "value",
+             "reading_type", "is_estimated", "filename", "import_seq"},
+        )
+
+    def test_bad_cursor_rejected(self):
+        response = self.client.get("/api/changes/", {"since": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            decode_cursor("W10")  # base64 of "[]"
+
+
+class TestExportChangesCommand(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.5", "90.0"))
+        self.tmpdir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.tmpdir, "out")
+        self.cursor_file = os.path.join(self.tmpdir, "cursor")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def export(self, *args):
+        call_command(
+            "export_changes", self.output_dir, "--cursor-file", self.cursor_file, *args,
+            stdout=io.StringIO(),
+        )
+
+    def exported_rows(self):
+        rows = []
+        for name in sorted(os.listdir(self.output_dir)):
+            with open(os.path.join(self.output_dir, name)) as f:
+                rows += [json.loads(line) for line in f]
+        return rows
+
+    def test_writes_pages_and_resumes_from_cursor(self):
+        self.export("--page-size", "3")
+        self.assertEqual(len(os.listdir(self.output_dir)), 2)
+        self.assertEqual(len(self.exported_rows()), 4)
+
+        # nothing new - no files, cursor unchanged
+        with open(self.cursor_file) as f:
+            cursor = f.read()
+        self.export()
+        self.assertEqual(len(os.listdir(self.output_dir)), 2)
+        with open(self.cursor_file) as f:
+            self.assertEqual(f.read(), cursor)
+
+        import_flow_file(flow_file("3", "20160422000000", "250.0", "120.0"))
+        shutil.rmtree(self.output_dir)
+        self.export()
+        self.assertEqual({row["filename"] for row in self.exported_rows()}, {"3.uff"})
+
+    def test_bad_cursor(self):
+        with self.assertRaises(CommandError):
+            self.export("--since", "not-a-cursor")
@@ -0,0 +1,136 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import skipIf
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from meter_readings.models import FlowFile, Reading
+from meter_readings.parser import (
+    detect_compression,
+    iter_d0010_fileobj,
+    iter_d0010_path,
+    parse_d0010_file,
+)
+from meter_readings.tests.helpers import SAMPLE_D0010
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestCompressedParsing(TestCase):
+    """Compressed inputs should parse the same as the plain file."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, filename, data):
+        path = os.path.join(self.tmpdir, filename)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def write_zip(self, filename, members):
+        path = os.path.join(self.tmpdir, filename)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return path
+
+    def test_detects_compression_from_magic_bytes(self):
+        self.assertEqual(detect_compression(io.BytesIO(gzip.compress(b"x"))), "gzip")
+        self.assertIsNone(detect_compression(io.BytesIO(SAMPLE_D0010.encode())))
+
+    def test_parses_gzip_file(self):
+        path = self.write("sample.uff.gz", gzip.compress(SAMPLE_D0010.encode()))
+        result = parse_d0010_file(path)
+        # .gz suffix dropped so the stored name is the flow file's own
+        self.assertEqual(result.filename, "sample.uff")
+        self.assertEqual(result.file_header_id, "0000475656")
+        self.assertEqual(len(result.meter_points), 2)
+
+    def test_plain_file_still_parses(self):
+        path = self.write("sample.uff", SAMPLE_D0010.encode())
+        result = parse_d0010_file(path)
+        self.assertEqual(result.filename, "sample.uff")
+        self.assertEqual(len(result.meter_points[1].meters[0].readings), 2)
+
+    def test_zip_yields_each_member(self):
+        path = self.write_zip("batch.zip", {
+            "first.uff": SAMPLE_D0010,
+            "nested/second.uff": SAMPLE_D0010,
+        })
+        results = list(iter_d0010_path(path))
+        self.assertEqual([r.filename for r in results], ["first.uff", "second.uff"])
+
+    def test_parse_single_file_rejects_multi_member_zip(self):
+        path = self.write_zip("batch.zip", {"a.uff": SAMPLE_D0010, "b.uff": SAMPLE_D0010})
+        with self.assertRaises(ValueError):
+            parse_d0010_file(path)
+
+    def test_fileobj_is_left_open(self):
+        # the upload view owns the stream so parsing mustn't close it
+        fileobj = io.BytesIO(SAMPLE_D0010.encode())
+        list(iter_d0010_fileobj(fileobj, "sample.uff"))
+        self.assertFalse(fileobj.closed)
+
+    @skipIf(zstandard is None, "zstandard isn't installed")
+    def test_parses_zstd_and_leaves_fileobj_open(self):
+        fileobj = io.BytesIO(zstandard.ZstdCompressor().compress(SAMPLE_D0010.encode()))
+        results = list(iter_d0010_fileobj(fileobj, "sample.uff.zst"))
+        self.assertEqual([r.filename for r in results], ["sample.uff"])
+        self.assertEqual(len(results[0].meter_points), 2)
+        self.assertFalse(fileobj.closed)
+
+
+class TestCompressedImport(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_command_imports_zip_member_by_member(self):
+        path = os.path.join(self.tmpdir, "batch.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("first.uff", SAMPLE_D0010)
+            archive.writestr("second.uff", SAMPLE_D0010)
+
+        call_command("import_d0010", path, stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(FlowFile.objects.values_list("filename", flat=True)),
+            ["first.uff", "second.uff"],
+        )
+        self.assertEqual(Reading.objects.count(), 6)
+
+    def test_upload_accepts_gzip(self):
+        upload = SimpleUploadedFile("sample.uff.gz", gzip.compress(SAMPLE_D0010.encode()))
+        response = self.client.post("/api/upload/", {"file": upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FlowFile.objects.get().filename, "sample.uff")
+        self.assertEqual(Reading.objects.count(), 3)
+
+    def test_upload_with_bad_zip_member_imports_nothing(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("good.uff", SAMPLE_D0010)
+            archive.writestr("bad.uff", "not a flow file\n")
+        upload = SimpleUploadedFile("batch.zip", buffer.getvalue())
+        response = self.client.post("/api/upload/", {"file": upload})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FlowFile.objects.count(), 0)
+        self.assertEqual(Reading.objects.count(), 0)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from meter_readings import fast_rows
+from meter_readings.importer import import_flow_file
+from meter_readings.models import Reading
+from meter_readings.serializers import ReadingSerializer
+from meter_readings.tests.helpers import flow_file
+
+
+class TestFastReadingRows(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.5", "90.0"))
+
+    def serializer_payload(self):
+        queryset = Reading.objects.select_related("meter__meter_point__flow_file").order_by("id")
+        return [dict(row) for row in ReadingSerializer(queryset, many=True).data]
+
+    def test_matches_serializer_output(self):
+        response = self.client.get("/api/readings/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(sorted(response.json(), key=lambda r: r["id"]), self.serializer_payload())
+
+    def test_stdlib_fallback_matches(self):
+        with mock.patch.object(fast_rows, "orjson", None):
+            response = self.client.get("/api/readings/")
+        self.assertEqual(sorted(response.json(), key=lambda r: r["id"]), self.serializer_payload())
+
+    def test_search_still_applies(self):
+        response = self.client.get("/api/readings/", {"search": "S95 105423"})
+        self.assertEqual(len(response.json()), 4)
+        response = self.client.get("/api/readings/", {"search": "nothing-matches"})
+        self.assertEqual(response.json(), [])
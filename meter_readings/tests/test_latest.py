@@ -0,0 +1,70 @@
+import io
+from datetime import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from meter_readings.importer import import_flow_file
+from meter_readings.models import LatestRegisterReading
+from meter_readings.tests.helpers import flow_file
+
+
+class TestLatestRegisterReading(TestCase):
+
+    def test_import_creates_one_row_per_register(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+
+        rows = LatestRegisterReading.objects.order_by("register_id")
+        self.assertEqual(
+            [(r.register_id, str(r.value)) for r in rows],
+            [("01", "100.0"), ("02", "50.0")],
+        )
+
+    def test_newer_read_replaces_latest(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+
+        row = LatestRegisterReading.objects.get(register_id="01")
+        self.assertEqual(str(row.value), "180.0")
+        self.assertEqual(row.reading_date, timezone.make_aware(datetime(2016, 3, 22)))
+        self.assertEqual(LatestRegisterReading.objects.count(), 2)
+
+    def test_older_read_leaves_latest_alone(self):
+        # files can arrive out of order - a late backfill mustn't win
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+
+        row = LatestRegisterReading.objects.get(register_id="01")
+        self.assertEqual(str(row.value), "180.0")
+
+    def test_latest_endpoint(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+
+        response = self.client.get("/api/meter-points/2200031930792/latest/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r["register_id"], r["value"]) for r in response.json()],
+            [("01", "180.0"), ("02", "90.0")],
+        )
+
+    def test_rebuild_command_matches_incremental_updates(self):
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        expected = list(
+            LatestRegisterReading.objects
+            .order_by("register_id")
+            .values_list("register_id", "value", "reading_id")
+        )
+
+        LatestRegisterReading.objects.all().delete()
+        call_command("rebuild_latest_readings", stdout=io.StringIO())
+
+        rebuilt = list(
+            LatestRegisterReading.objects
+            .order_by("register_id")
+            .values_list("register_id", "value", "reading_id")
+        )
+        self.assertEqual(rebuilt, expected)
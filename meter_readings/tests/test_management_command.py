@@ -1,8 +1,13 @@
+import io
 import os
+import tempfile
+from unittest import mock
+
 from django.test import TestCase
 from django.core.management import call_command
 
 from meter_readings.models import FlowFile, MeterPoint, Meter, Reading
+from meter_readings.tests.helpers import SAMPLE_D0010
 
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
@@ -35,4 +40,23 @@ class TestImportCommand(TestCase):
     def test_handles_invalid_file_gracefully(self):
         # Should not raise an exception, just print an error
         call_command("import_d0010", "/nonexistent/file.uff")
-        self.assertEqual(FlowFile.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(FlowFile.objects.count(), 0)
+
+
+class TestImportCommandStdin(TestCase):
+
+    def test_reads_file_list_from_stdin(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for name in ("a.uff", "b.uff"):
+                path = os.path.join(tmpdir, name)
+                with open(path, "w") as f:
+                    f.write(SAMPLE_D0010)
+                paths.append(path)
+
+            stdin = io.StringIO("\n".join(paths) + "\n")
+            with mock.patch("sys.stdin", stdin):
+                call_command("import_d0010", "--stdin", stdout=io.StringIO())
+
+        self.assertEqual(FlowFile.objects.count(), 2)
+        self.assertEqual(Reading.objects.count(), 6)
@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from meter_readings.importer import import_flow_file
+from meter_readings.profiling import SLOW_REQUEST_LOGGER, normalise_sql
+from meter_readings.tests.helpers import flow_file
+
+
+PROFILE_EVERYTHING = {"SAMPLE_RATE": 1.0, "SLOW_REQUEST_MS": 0}
+# sampled, but nothing is slow enough to reach the log file
+PROFILE_NOT_LOGGED = {"SAMPLE_RATE": 1.0, "SLOW_REQUEST_MS": 60000}
+
+
+class TestQueryProfilingMiddleware(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+
+    @override_settings(QUERY_PROFILING=PROFILE_NOT_LOGGED)
+    def test_server_timing_header(self):
+        response = self.client.get("/api/files/")
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'sql;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    @override_settings(QUERY_PROFILING=PROFILE_NOT_LOGGED)
+    def test_fast_rows_count_as_serialize(self):
+        response = self.client.get("/api/readings/")
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+
+    @override_settings(QUERY_PROFILING=PROFILE_EVERYTHING)
+    def test_slow_request_logged_with_plans(self):
+        with self.assertLogs(SLOW_REQUEST_LOGGER) as logs:
+            self.client.get("/api/meter-points/")
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["route"], "api/meter-points/")
+        self.assertEqual(entry["status"], 200)
+        self.assertGreater(entry["sql_count"], 0)
+        self.assertLessEqual(len(entry["queries"]), 5)
+        select = next(q for q in entry["queries"] if q["sql"].startswith("SELECT"))
+        self.assertTrue(select["plan"])
+
+    @override_settings(QUERY_PROFILING=PROFILE_NOT_LOGGED)
+    def test_fast_request_not_logged(self):
+        with self.assertNoLogs(SLOW_REQUEST_LOGGER):
+            response = self.client.get("/api/stats/")
+        self.assertIn("Server-Timing", response)
+
+    def test_off_by_default(self):
+        response = self.client.get("/api/files/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(QUERY_PROFILING=PROFILE_NOT_LOGGED)
+    def test_only_api_requests(self):
+        response = self.client.get("/admin/login/")
+        self.assertNotIn("Server-Timing", response)
+
+    def test_normalise_sql_collapses_in_lists(self):
+        self.assertEqual(
+            normalise_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            normalise_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s)'),
+        )
+
+
+class TestTopSlowQueriesCommand(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmpdir, "slow_requests.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, filepath, *entries):
+        with open(filepath, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def entry(self, route, *queries):
+        return {
+            "method": "GET", "path": f"/{route}", "route": route, "status": 200,
+            "total_ms": 800.0, "sql_ms": 700.0, "sql_count": len(queries),
+            "queries": [{"alias": "default", "sql": sql, "ms": ms, "plan": ["SCAN t"]} for sql, ms in queries],
+        }
+
+    def test_summarises_current_and_rotated_logs(self):
+        self.write(self.log, self.entry("api/files/", ("SELECT a", 400.0), ("SELECT b", 10.0)))
+        self.write(self.log + ".1", self.entry("api/meter-points/", ("SELECT a", 300.0)))
+        with open(self.log + ".1", "a") as f:
+            f.write('{"cut short')
+
+        out = io.StringIO()
+        call_command("top_slow_queries", "--log-file", self.log, "--plans", stdout=out)
+        output = out.getvalue()
+
+        self.assertIn("2 slow requests in 2 file(s)", output)
+        self.assertIn("1. 700.0 ms total, 2x, max 400.0 ms - GET api/files/, GET api/meter-points/", output)
+        self.assertIn("SCAN t", output)
+        self.assertLess(output.index("SELECT a"), output.index("SELECT b"))
@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from meter_readings.importer import import_flow_file
+from meter_readings.api_views import StatsView
+from meter_readings.replay import NO_RESPONSE, HTTPTarget, LoggedRequest, compare, load_log, percentile
+from meter_readings.tests.helpers import flow_file
+
+
+class TestReplayRequests(TestCase):
+
+    def setUp(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        self.tmpdir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmpdir, "requests.jsonl")
+        with open(self.log, "w") as f:
+            f.write(json.dumps({"method": "GET", "path": "/api/readings/", "query": {"search": "S95"}}) + "\n")
+            f.write(json.dumps({"method": "GET", "path": "/api/meter-points/2200031930792/"}) + "\n")
+            f.write(json.dumps({"method": "GET", "path": "/api/meter-points/1111111111111/"}) + "\n")
+            f.write(json.dumps({"request_id": "not-a-request"}) + "\n")
+            f.write(json.dumps({"method": "POST", "path": "/api/token/", "body": {"username": "x", "password": "y"}}) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_replay(self, *args):
+        output = os.path.join(self.tmpdir, "report.json")
+        call_command("replay_requests", self.log, "--output", output, *args, stdout=io.StringIO())
+        with open(output) as f:
+            return json.load(f)
+
+    def test_skips_lines_without_path(self):
+        self.assertEqual(len(load_log(self.log)), 4)
+
+    def test_report_groups_by_route(self):
+        report = self.run_replay()
+
+        self.assertEqual(report["requests"], 4)
+        endpoints = report["endpoints"]
+        self.assertEqual(endpoints["GET /api/meter-points/<str:mpan>/"]["requests"], 2)
+        self.assertEqual(endpoints["POST /api/token/"]["errors"], 1)
+        self.assertGreater(endpoints["GET /api/readings/"]["avg_queries"], 0)
+        self.assertGreaterEqual(endpoints["GET /api/readings/"]["p90_ms"], 0)
+
+    def test_repeat_multiplies_requests(self):
+        report = self.run_replay("--repeat", "3")
+        self.assertEqual(report["requests"], 12)
+
+    def test_compare_flags_regressions(self):
+        report = self.run_replay()
+        faster = json.loads(json.dumps(report))
+        for stats in faster["endpoints"].values():
+            stats["p90_ms"] = stats["p90_ms"] / 100 or 0.0001
+            stats["avg_queries"] = 0
+        previous = os.path.join(self.tmpdir, "previous.json")
+        with open(previous, "w") as f:
+            json.dump(faster, f)
+
+        self.assertTrue(compare(report, faster, 0.2))
+        with self.assertRaises(CommandError):
+            self.run_replay("--compare", previous)
+
+    def test_server_error_is_counted_not_fatal(self):
+        with open(self.log, "a") as f:
+            f.write(json.dumps({"method": "GET", "path": "/api/stats/"}) + "\n")
+        with mock.patch.object(StatsView, "get", side_effect=RuntimeError("boom")):
+            with self.assertLogs("django.request", "ERROR"):
+                report = self.run_replay()
+        self.assertEqual(report["endpoints"]["GET /api/stats/"]["errors"], 1)
+        self.assertEqual(report["requests"], 5)
+
+    def test_missing_compare_file(self):
+        with self.assertRaises(CommandError):
+            self.run_replay("--compare", os.path.join(self.tmpdir, "missing.json"))
+
+    def test_unreachable_server_is_an_error(self):
+        # nothing listens on port 9 (discard) here
+        status, _ = HTTPTarget("http://127.0.0.1:9").send(LoggedRequest("GET", "/api/stats/", headers={}))
+        self.assertEqual(status, NO_RESPONSE)
+
+    def test_percentile_nearest_rank(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(values, 50), 2.0)
+        self.assertEqual(percentile(values, 99), 4.0)
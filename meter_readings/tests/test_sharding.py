@@ -0,0 +1,208 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+
+from meter_readings.api_views import MeterPointListView, ReadingListView
+from meter_readings import importer
+from meter_readings.changes import changes_page, decode_cursor
+from meter_readings.importer import import_flow_file
+from meter_readings.models import FlowFile, MeterPoint, Reading, LatestRegisterReading
+from meter_readings.parser import parse_d0010_lines
+from meter_readings.sharding import ShardRouter, shard_aliases, shard_for_mpan
+from meter_readings.tests.helpers import SAMPLE_D0010
+
+
+SHARDS = ["shard_0", "shard_1"]
+
+
+class TwoPerPage(PageNumberPagination):
+    page_size = 2
+
+
+@override_settings(READING_SHARDS=SHARDS)
+class TestSharding(TestCase):
+    """Two SQLite test databases stand in for the shard servers."""
+    databases = {"default", *SHARDS}
+
+    def setUp(self):
+        import_flow_file(parse_d0010_lines(SAMPLE_D0010.splitlines(), "sample.uff"))
+
+    def test_mpan_always_maps_to_the_same_shard(self):
+        self.assertEqual(shard_for_mpan("1200023305967"), "shard_1")
+        self.assertEqual(shard_for_mpan("2200031930792"), "shard_0")
+
+    def test_import_fans_meter_points_out_to_their_shards(self):
+        self.assertEqual(
+            list(MeterPoint.objects.using("shard_1").values_list("mpan", flat=True)),
+            ["1200023305967"],
+        )
+        self.assertEqual(
+            list(MeterPoint.objects.using("shard_0").values_list("mpan", flat=True)),
+            ["2200031930792"],
+        )
+        self.assertEqual(Reading.objects.using("shard_0").count(), 2)
+        self.assertEqual(Reading.objects.using("shard_1").count(), 1)
+        # each shard holds its own copy of the file row
+        self.assertEqual(FlowFile.objects.using("shard_0").count(), 1)
+        self.assertEqual(FlowFile.objects.using("shard_1").count(), 1)
+        self.assertEqual(LatestRegisterReading.objects.using("shard_0").count(), 2)
+
+    def test_failure_on_second_shard_rolls_back_the_first(self):
+        real = importer.update_latest_readings
+        calls = []
+
+        def fail_second(saved, using):
+            calls.append(using)
+            if len(calls) == 2:
+                raise RuntimeError("shard down")
+            real(saved, using=using)
+
+        with mock.patch.object(importer, "update_latest_readings", fail_second):
+            with self.assertRaises(RuntimeError):
+                import_flow_file(parse_d0010_lines(SAMPLE_D0010.splitlines(), "again.uff"))
+        self.assertEqual(len(calls), 2)
+        for alias in SHARDS:
+            self.assertFalse(FlowFile.objects.using(alias).filter(filename="again.uff").exists())
+            self.assertEqual(MeterPoint.objects.using(alias).count(), 1)
+
+    def test_nothing_lands_on_default(self):
+        self.assertEqual(MeterPoint.objects.using("default").count(), 0)
+
+    def test_detail_view_routes_to_shard(self):
+        response = self.client.get("/api/meter-points/1200023305967/")
+        self.assertEqual(response.json()["meters"][0]["serial_number"], "F75A 00802")
+
+        response = self.client.get("/api/meter-points/2200031930792/latest/")
+        self.assertEqual(len(response.json()), 2)
+
+    def test_reading_list_gathers_all_shards(self):
+        response = self.client.get("/api/readings/")
+        self.assertEqual(len(response.json()), 3)
+
+        response = self.client.get("/api/readings/", {"search": "F75A"})
+        self.assertEqual([r["mpan"] for r in response.json()], ["1200023305967"])
+
+    def test_meter_point_list_gathers_all_shards(self):
+        response = self.client.get("/api/meter-points/")
+        self.assertEqual(
+            sorted(mp["mpan"] for mp in response.json()),
+            ["1200023305967", "2200031930792"],
+        )
+
+    def test_stats_sum_over_shards(self):
+        stats = self.client.get("/api/stats/").json()
+        self.assertEqual(stats["total_readings"], 3)
+        self.assertEqual(stats["total_meter_points"], 2)
+        self.assertEqual(stats["total_files"], 1)
+
+    def test_file_list_merges_split_file(self):
+        files = self.client.get("/api/files/").json()
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0]["meter_point_count"], 2)
+        self.assertEqual(files[0]["reading_count"], 3)
+
+    def test_separate_imports_of_a_file_stay_separate(self):
+        import_flow_file(parse_d0010_lines(SAMPLE_D0010.splitlines(), "sample.uff"))
+
+        files = self.client.get("/api/files/").json()
+        self.assertEqual(len(files), 2)
+        self.assertEqual([f["reading_count"] for f in files], [3, 3])
+        self.assertEqual(self.client.get("/api/stats/").json()["total_files"], 2)
+
+    def test_anomaly_file_filter_uses_import_id(self):
+        # a regression on each shard, from files whose pks are the same
+        for header_id, value in (("10", "100.0"), ("11", "80.0")):
+            import_flow_file(parse_d0010_lines([
+                f"ZHV|{header_id}|D0010002|D|UDMS|X|MRCY|20160302153151||||OPER|",
+                "026|2200031930792|V|",
+                "028|S95 105423|C|",
+                f"030|01|2016042{header_id[-1]}000000|{value}|||T|N|",
+                "ZPT|0000475656|1||1|20160302153151|",
+            ], "a.uff"))
+            import_flow_file(parse_d0010_lines([
+                f"ZHV|{header_id}|D0010002|D|UDMS|X|MRCY|20160302153151||||OPER|",
+                "026|1200023305967|V|",
+                "028|F75A 00802|D|",
+                f"030|S|2016042{header_id[-1]}000000|{value}|||T|N|",
+                "ZPT|0000475656|1||1|20160302153151|",
+            ], "b.uff"))
+        a = FlowFile.objects.using("shard_0").get(file_header_id="11")
+        b = FlowFile.objects.using("shard_1").get(file_header_id="11")
+        self.assertEqual(a.pk, b.pk)
+
+        response = self.client.get("/api/anomalies/", {"flow_file": str(a.import_id)})
+        self.assertEqual([row["mpan"] for row in response.json()], ["2200031930792"])
+
+    def test_readings_by_date_merges_shards(self):
+        rows = self.client.get("/api/readings/by-date/").json()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["count"], 3)
+
+    def test_meter_data_admin_is_hidden(self):
+        self.client.force_login(User.objects.create_superuser("support", "support@example.com", "pw"))
+        self.assertEqual(self.client.get("/admin/meter_readings/reading/").status_code, 403)
+        self.assertEqual(self.client.get("/admin/meter_readings/flowfile/").status_code, 403)
+        index = self.client.get("/admin/")
+        self.assertNotContains(index, "/admin/meter_readings/reading/")
+        self.assertContains(index, "/admin/meter_readings/processedfile/")
+
+    @mock.patch.object(ReadingListView, "pagination_class", TwoPerPage)
+    def test_pages_limit_each_shard(self):
+        with CaptureQueriesContext(connections["shard_0"]) as queries:
+            page = self.client.get("/api/readings/").json()
+        self.assertEqual(page["count"], 3)
+        self.assertEqual(len(page["results"]), 2)
+        self.assertIn("LIMIT 2", next(q["sql"] for q in queries if "LIMIT" in q["sql"]))
+
+        page = self.client.get("/api/readings/", {"page": 2}).json()
+        self.assertEqual(len(page["results"]), 1)
+
+    def test_change_feed_walks_every_shard(self):
+        rows, cursor, has_more = changes_page(None, page_size=2)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(has_more)
+        rest, cursor, has_more = changes_page(cursor, page_size=2)
+        self.assertFalse(has_more)
+        self.assertEqual(len(rows + rest), 3)
+        self.assertEqual(set(decode_cursor(cursor)), set(SHARDS))
+
+
+class TestUnshardedLists(TestCase):
+
+    def setUp(self):
+        import_flow_file(parse_d0010_lines(SAMPLE_D0010.splitlines(), "sample.uff"))
+
+    @mock.patch.object(ReadingListView, "pagination_class", TwoPerPage)
+    @mock.patch.object(MeterPointListView, "pagination_class", TwoPerPage)
+    def test_single_database_pages_in_sql(self):
+        with CaptureQueriesContext(connections["default"]) as queries:
+            page = self.client.get("/api/readings/", {"page": 2}).json()
+        self.assertEqual(page["count"], 3)
+        self.assertEqual(len(page["results"]), 1)
+        self.assertTrue(any("LIMIT 1 OFFSET 2" in q["sql"] for q in queries))
+
+        with CaptureQueriesContext(connections["default"]) as queries:
+            page = self.client.get("/api/meter-points/").json()
+        self.assertEqual(page["count"], 2)
+        self.assertTrue(any("LIMIT 2" in q["sql"] for q in queries))
+
+
+class TestShardRouter(TestCase):
+
+    def test_unsharded_has_no_opinion(self):
+        with self.settings(READING_SHARDS=[]):
+            self.assertEqual(shard_aliases(), ["default"])
+            self.assertIsNone(ShardRouter().allow_migrate("default", "meter_readings", "reading"))
+
+    def test_meter_data_only_migrates_to_shards(self):
+        router = ShardRouter()
+        with self.settings(READING_SHARDS=SHARDS):
+            self.assertTrue(router.allow_migrate("shard_0", "meter_readings", "reading"))
+            self.assertFalse(router.allow_migrate("default", "meter_readings", "reading"))
+            self.assertFalse(router.allow_migrate("shard_0", "auth", "user"))
+            self.assertFalse(router.allow_migrate("shard_0", "meter_readings", "processedfile"))
+            self.assertIsNone(router.allow_migrate("default", "meter_readings", "processedfile"))
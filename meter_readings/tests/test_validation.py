@@ -0,0 +1,107 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from meter_readings.importer import import_flow_file
+from meter_readings.models import ReadingAnomaly
+from meter_readings.tests.helpers import flow_file
+from meter_readings.validation import flag_anomalies
+
+
+class TestReadingValidation(TestCase):
+
+    def test_clean_history_has_no_anomalies(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        self.assertEqual(ReadingAnomaly.objects.count(), 0)
+
+    def test_flags_regression(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "80.0", "90.0"))
+
+        anomaly = ReadingAnomaly.objects.get()
+        self.assertEqual(anomaly.kind, ReadingAnomaly.REGRESSION)
+        self.assertEqual(anomaly.reading.register_id, "01")
+        self.assertEqual(str(anomaly.previous_value), "100.0")
+        self.assertEqual(anomaly.mpan, "2200031930792")
+
+    @override_settings(READING_MAX_JUMP=1000)
+    def test_flags_implausible_jump(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "5000.0", "90.0"))
+
+        self.assertEqual(
+            list(ReadingAnomaly.objects.values_list("kind", flat=True)),
+            [ReadingAnomaly.JUMP],
+        )
+
+    def test_flags_duplicate_register_read(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+
+        self.assertEqual(
+            set(ReadingAnomaly.objects.values_list("kind", flat=True)),
+            {ReadingAnomaly.DUPLICATE},
+        )
+        self.assertEqual(ReadingAnomaly.objects.count(), 2)
+
+    def test_backfill_rechecks_following_reads(self):
+        # an older file arriving late can make an existing read a regression
+        import_flow_file(flow_file("2", "20160322000000", "180.0", "90.0"))
+        import_flow_file(flow_file("1", "20160222000000", "200.0", "50.0"))
+
+        anomaly = ReadingAnomaly.objects.get()
+        self.assertEqual(anomaly.kind, ReadingAnomaly.REGRESSION)
+        self.assertEqual(str(anomaly.reading.value), "180.0")
+
+    @override_settings(READING_MAX_JUMP=1000)
+    def test_backfill_clears_stale_anomaly(self):
+        import_flow_file(flow_file("1", "20160122000000", "100.0", "50.0"))
+        import_flow_file(flow_file("3", "20160322000000", "1900.0", "90.0"))
+        self.assertEqual(ReadingAnomaly.objects.get().kind, ReadingAnomaly.JUMP)
+
+        # the read in between makes both steps plausible
+        import_flow_file(flow_file("2", "20160222000000", "1000.0", "70.0"))
+        self.assertEqual(ReadingAnomaly.objects.count(), 0)
+
+    def test_since_only_checks_recent_reads(self):
+        import_flow_file(flow_file("1", "20160122000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160222000000", "80.0", "60.0"))
+        import_flow_file(flow_file("3", "20160322000000", "90.0", "70.0"))
+
+        with CaptureQueriesContext(connection) as queries:
+            found = flag_anomalies(["2200031930792"], since=timezone.make_aware(datetime(2016, 3, 22)))
+        self.assertEqual(found, 0)
+        # LAG() only runs over reads from the one before `since` onwards
+        window_query = next(q["sql"] for q in queries if "LAG(" in q["sql"])
+        self.assertIn('"reading_date" >= \'2016-02-22', window_query)
+        # the older regression is left alone
+        self.assertEqual(ReadingAnomaly.objects.get().reading.value, Decimal("80.0"))
+
+    def test_rerunning_does_not_duplicate_anomalies(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "80.0", "90.0"))
+        flag_anomalies()
+        self.assertEqual(ReadingAnomaly.objects.count(), 1)
+
+    def test_anomalies_endpoint_filters(self):
+        import_flow_file(flow_file("1", "20160222000000", "100.0", "50.0"))
+        import_flow_file(flow_file("2", "20160322000000", "80.0", "40.0"))
+
+        response = self.client.get("/api/anomalies/", {"kind": "regression"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(row["register_id"] for row in response.json()),
+            ["01", "02"],
+        )
+
+        response = self.client.get("/api/anomalies/", {"kind": "jump"})
+        self.assertEqual(response.json(), [])
+
+    def test_anomalies_endpoint_rejects_bad_file_id(self):
+        response = self.client.get("/api/anomalies/", {"flow_file": "abc"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,119 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from meter_readings.management.commands import watch_d0010
+from meter_readings.models import FlowFile, ProcessedFile, Reading
+from meter_readings.tests.helpers import SAMPLE_D0010
+
+
+class TestWatchCommand(TestCase):
+
+    def setUp(self):
+        self.drop_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.drop_dir)
+
+    def drop(self, filename, content):
+        with open(os.path.join(self.drop_dir, filename), "w") as f:
+            f.write(content)
+
+    def scan(self):
+        call_command(
+            "watch_d0010", self.drop_dir, "--once", "--settle", "0",
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+
+    def test_imports_and_moves_to_done(self):
+        self.drop("sample.uff", SAMPLE_D0010)
+        self.scan()
+
+        self.assertEqual(Reading.objects.count(), 3)
+        self.assertTrue(os.path.exists(os.path.join(self.drop_dir, "done", "sample.uff")))
+        self.assertFalse(os.path.exists(os.path.join(self.drop_dir, "sample.uff")))
+
+        ledger = ProcessedFile.objects.get()
+        self.assertEqual(ledger.status, ProcessedFile.IMPORTED)
+        self.assertEqual(ledger.reading_count, 3)
+
+    def test_same_file_dropped_twice_is_imported_once(self):
+        self.drop("sample.uff", SAMPLE_D0010)
+        self.scan()
+        self.drop("sample.uff", SAMPLE_D0010)
+        self.scan()
+
+        self.assertEqual(FlowFile.objects.count(), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.drop_dir, "done"))), 2)
+
+    def test_bad_file_moves_to_failed(self):
+        self.drop("broken.uff", "026|1200023305967|V|\n")
+        self.scan()
+
+        self.assertEqual(FlowFile.objects.count(), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.drop_dir, "failed", "broken.uff")))
+        self.assertEqual(ProcessedFile.objects.get().status, ProcessedFile.FAILED)
+
+    def test_zip_with_bad_member_imports_nothing(self):
+        with zipfile.ZipFile(os.path.join(self.drop_dir, "batch.zip"), "w") as archive:
+            archive.writestr("good.uff", SAMPLE_D0010)
+            archive.writestr("bad.uff", "026|1200023305967|V|\n")
+        self.scan()
+
+        self.assertEqual(FlowFile.objects.count(), 0)
+        self.assertEqual(ProcessedFile.objects.get().status, ProcessedFile.FAILED)
+
+        # fixed archive dropped again goes in once
+        with zipfile.ZipFile(os.path.join(self.drop_dir, "batch.zip"), "w") as archive:
+            archive.writestr("good.uff", SAMPLE_D0010)
+        self.scan()
+        self.assertEqual(FlowFile.objects.count(), 1)
+        self.assertEqual(Reading.objects.count(), 3)
+
+    def test_unsettled_file_is_left_alone(self):
+        # a file that's still being written shouldn't be picked up yet
+        self.drop("sample.uff", SAMPLE_D0010)
+        call_command(
+            "watch_d0010", self.drop_dir, "--once", "--settle", "60",
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(FlowFile.objects.count(), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.drop_dir, "sample.uff")))
+
+    def test_error_on_one_file_does_not_stop_the_scan(self):
+        self.drop("a.uff", SAMPLE_D0010)
+        self.drop("b.uff", SAMPLE_D0010.replace("0000475656", "0000475657"))
+        real = watch_d0010.file_sha256
+
+        def vanished(filepath):
+            if filepath.endswith("a.uff"):
+                raise FileNotFoundError(filepath)
+            return real(filepath)
+
+        with mock.patch.object(watch_d0010, "file_sha256", vanished):
+            self.scan()
+
+        self.assertEqual(list(FlowFile.objects.values_list("file_header_id", flat=True)), ["0000475657"])
+        self.assertTrue(os.path.exists(os.path.join(self.drop_dir, "a.uff")))
+
+    def test_ledger_commits_with_the_import(self):
+        self.drop("sample.uff", SAMPLE_D0010)
+        real = ProcessedFile.save
+
+        def fail_imported(ledger, *args, **kwargs):
+            if ledger.status == ProcessedFile.IMPORTED:
+                raise RuntimeError("ledger write failed")
+            real(ledger, *args, **kwargs)
+
+        with mock.patch.object(ProcessedFile, "save", fail_imported):
+            self.scan()
+
+        # no IMPORTED row means the readings mustn't be there either
+        self.assertEqual(Reading.objects.count(), 0)
+        self.assertEqual(ProcessedFile.objects.get().status, ProcessedFile.FAILED)
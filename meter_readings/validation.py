@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max, Q, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from meter_readings.models import Reading, ReadingAnomaly
+from meter_readings.sharding import MPAN_BATCH_SIZE
+
+
+def max_reading_jump() -> Decimal:
+    """Largest advance between two reads on a register before it's flagged."""
+    return Decimal(str(getattr(settings, 'READING_MAX_JUMP', 100000)))
+
+
+def _previous(expression):
+    # value of `expression` on the read before this one on the same register.
+    # Partitioned by MPAN + serial rather than meter_id, because every file
+    # creates new Meter rows for the same physical meter.
+    return Window(
+        Lag(expression),
+        partition_by=[
+            F('meter__meter_point__mpan'),
+            F('meter__serial_number'),
+            F('register_id'),
+        ],
+        order_by=[F('reading_date').asc(), F('id').asc()],
+    )
+
+
+def _window_start(readings, since):
+    """Earliest date the LAG() window needs to see so every read from
+    `since` on is compared with its real predecessor: the oldest of the
+    registers' last reads before `since`."""
+    previous = (
+        readings
+        .filter(reading_date__lt=since)
+        .values('meter__meter_point__mpan', 'meter__serial_number', 'register_id')
+        .annotate(last=Max('reading_date'))
+        .values_list('last', flat=True)
+    )
+    return min(previous, default=since)
+
+
+def find_anomalies(mpans=None, using: str = DEFAULT_DB_ALIAS, since=None):
+    """Readings that differ suspiciously from the previous read on their
+    register. The comparison happens in the database with LAG() so only
+    the flagged rows come back.
+    With `since`, only reads on or after that date are checked, and the
+    window covers just those reads plus the read before them on each
+    register rather than the whole history."""
+    jump = max_reading_jump()
+    readings = Reading.objects.using(using)
+    if mpans is not None:
+        readings = readings.filter(meter__meter_point__mpan__in=mpans)
+    if since is not None:
+        readings = readings.filter(reading_date__gte=_window_start(readings, since))
+
+    return (
+        readings
+        .annotate(
+            mpan=F('meter__meter_point__mpan'),
+            serial_number=F('meter__serial_number'),
+            previous_id=_previous('id'),
+            previous_date=_previous('reading_date'),
+            previous_value=_previous('value'),
+        )
+        .filter(
+            Q(previous_date=F('reading_date'))
+            | Q(value__lt=F('previous_value'))
+            | Q(value__gt=F('previous_value') + jump)
+        )
+        .values(
+            'id', 'mpan', 'serial_number', 'reading_date', 'value',
+            'previous_id', 'previous_date', 'previous_value',
+        )
+    )
+
+
+def classify(row: dict) -> str:
+    if row['previous_date'] == row['reading_date']:
+        return ReadingAnomaly.DUPLICATE
+    if row['value'] < row['previous_value']:
+        return ReadingAnomaly.REGRESSION
+    return ReadingAnomaly.JUMP
+
+
+def flag_anomalies(mpans=None, using: str = DEFAULT_DB_ALIAS, since=None) -> int:
+    """Recompute ReadingAnomaly rows for the given MPANs (or everything).
+    The importer runs this with the file's MPANs and its earliest reading
+    date as `since`, so a backfilled older read also re-checks the reads
+    after it. Existing anomalies in that range are replaced, not kept -
+    a backfill can clear an anomaly as well as cause one.
+    Returns the number of anomalous readings found."""
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    if mpans is None:
+        batches = [None]
+    else:
+        mpans = sorted(set(mpans))
+        batches = [mpans[i:i + MPAN_BATCH_SIZE] for i in range(0, len(mpans), MPAN_BATCH_SIZE)]
+
+    found = 0
+    with transaction.atomic(using=using):
+        for batch in batches:
+            stale = ReadingAnomaly.objects.using(using)
+            if batch is not None:
+                stale = stale.filter(mpan__in=batch)
+            if since is not None:
+                stale = stale.filter(reading__reading_date__gte=since)
+            stale.delete()
+
+            anomalies = [
+                ReadingAnomaly(
+                    reading_id=row['id'],
+                    previous_reading_id=row['previous_id'],
+                    kind=classify(row),
+                    mpan=row['mpan'],
+                    serial_number=row['serial_number'],
+                    previous_value=row['previous_value'],
+                )
+                for row in find_anomalies(batch, using, since)
+                # reads before `since` are only in the window as predecessors
+                if since is None or row['reading_date'] >= since
+            ]
+            ReadingAnomaly.objects.using(using).bulk_create(anomalies, ignore_conflicts=True)
+            found += len(anomalies)
+    return found